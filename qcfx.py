@@ -9,20 +9,35 @@ Email  : adityagaur.home@gmail.com
 
 # Imports 
 
-import os, json
+import os, sys, json, math, itertools, hashlib, struct, mmap, bisect, contextlib
 
 from PySide2.QtCore import *
 from PySide2.QtGui import *
 from PySide2.QtWidgets import *
-import pyautogui
 from PIL import Image, ImageFilter, ImageQt
+import numpy as np
 
 import threading
-import win32gui
+import multiprocessing, atexit
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import time
+from collections import OrderedDict
 
 import ctypes
 
+# Desktop capture dependencies; only the Win32 backend needs them, so a headless host (CI, benchmarks) can still import QCFx 
+try:
+    import pyautogui
+except Exception: # pyautogui raises on import when there is no display to attach to
+    pyautogui = None
+
+try:
+    import win32gui
+except ImportError:
+    win32gui = None
+
 from json import JSONDecodeError
 from pathlib import Path
 import shutil
@@ -53,16 +68,47 @@ class QCFx:
             'desktopMonitoring':True, # Monitoring only on desktop (detects desktop wallpaper changes), If you are developing an app which sticks to desktop only, perfect mode for you! 
             'blurringFunction': 2,  # Basically, Quality factor; Lower means worse quality (0,1,2);
             'blurRadius':40, # Blur radius; Magnitude of blur 
+            'blurPipeline':'blurFirst', # 'blurFirst' blurs at full resolution then shrinks; 'downscaleFirst' shrinks first and blurs at the reduced resolution (much faster, looks the same)
+            'blurPrescale':1, # downscaleFirst only; Extra shrink factor on top of blurScalingFactor before blurring (Large radii tolerate 2-4)
+            'blurUpsample':True, # downscaleFirst only; Upsample the blurred image back to blurScalingFactor resolution after a blurPrescale shrink
+            'blurKernel':'gaussian', # 'gaussian' (PIL) or one of the NumPy kernels 'box', 'stack', 'kawase' (cost independent of blurRadius)
+            'captureRegion':'screen', # 'screen' captures & blurs the whole screen; 'parent' only the parent's rectangle plus blurRadius and roiSlack
+            'roiSlack':100, # captureRegion 'parent' only; Pixels the parent can move in any direction before the background is re-captured
+            'refreshCoalesceWindow':150, # Refresh requests (window changes, wallpaper changes, ...) arriving within this many ms are merged into one capture
+            'presentMode':'crop', # 'crop' crops & resizes the blurred image on every move; 'atlas' upsamples it once per capture so moves are a plain copy
+            'atlasTileSize':512, # presentMode 'atlas' only; Tile edge in display pixels
+            'atlasMemoryBudget':128, # presentMode 'atlas' only; MB of display-resolution tiles kept in memory, the rest are built on demand
+            'backdropCache':True, # Desktop-only modes; Reuse blurred wallpapers (in memory & in QCFxData/cache) when the wallpaper and blur settings are unchanged
+            'backdropCacheMemory':64, # MB of blurred backdrops kept in memory (shared by every QCFx_Blur in the process)
+            'backdropCacheDisk':256, # MB of blurred backdrops kept on disk
+            'incrementalBlur':False, # Re-blur only the parts of the screen that changed since the last capture (window events); Not for the 'kawase' kernel
+            'incrementalTileSize':64, # incrementalBlur only; Edge in pixels of the tiles compared between captures
+            'blurWorkers':0, # Worker processes that blur (0 blurs in the capture thread); Each capture is split into bands blurred in parallel
+            'blurBands':0, # blurWorkers only; Bands per capture, 0 means one per worker
+            'sharedBackdrop':False, # captureRegion 'screen' only; One process on the machine blurs, the others map its result from QCFxData/shared
+            'adaptiveQuality':True, # While the parent is dragged, lower the frames' resample quality & resolution to stay within frameBudget; Full quality once it stops
+            'frameBudget':16, # adaptiveQuality only; Target ms per drag frame (render + present)
+            'progressiveStartup':True, # Show a quick low-res blur first and refine it in the background, instead of blocking the constructor on a full-quality blur
+            'previewScale':4, # Extra shrink factor (on top of blurScalingFactor) of the startup preview
+            'profiling':False, # Time every pipeline stage (QCFx_Blur.profileStats()); Negligible cost when off
+            'profileExport':None, # profiling only; File every timed span is appended to, None to keep only the in-memory histograms
+            'profileFormat':'chrome', # profileExport only; 'chrome' (trace events for chrome://tracing or Perfetto) or 'jsonl' (one JSON object per span)
             'blurLayerStylesheet' : "background-color:none; border-radius:8px; padding:2px;", # Stylesheet of Blur Layer
             "showWindowTitlebar":True ,
             "showWindowBorders":True 
         }
 
-        appdata_path = os.path.join(os.getenv('APPDATA'), '/QCFxData/')
+        if os.getenv('QCFX_DATA') is not None: # Explicit settings & cache directory (benchmarks, tests, portable installs)
+            appdata_path = os.getenv('QCFX_DATA')
+        elif os.getenv('APPDATA') is not None:
+            appdata_path = os.path.join(os.getenv('APPDATA'), '/QCFxData/')
+        else: # Non-Windows hosts (headless CI, benchmarks)
+            appdata_path = os.path.join(os.path.expanduser('~'), '.QCFxData')
+        self.DATA_PATH = appdata_path
         self.SETTINGS_PATH = os.path.join(appdata_path, 'settings.json')
         
         if not os.path.exists(appdata_path): 
-            os.mkdir(appdata_path)
+            os.makedirs(appdata_path)
             with open(self.SETTINGS_PATH, 'w') as sFile: 
                 try:
                     temp = {"Settings": self.SETTINGS_DEFAULT}
@@ -78,32 +124,26 @@ class QCFx:
                 except JSONDecodeError as e:
                     print(e)
 
+        # Every QCFx in the process reads the same in-memory copy; the file is only parsed again after it changes
+        self.store = QCFx_SettingsStore.shared(self.SETTINGS_PATH, self.SETTINGS_DEFAULT)
         self.loadSettings()
 
     def loadSettings(self):
-        with open(self.SETTINGS_PATH, 'r') as file:
-            try:
-                self.sessionSettings = json.load(file)
-                self.sessionSettings = self.sessionSettings['Settings']
-            except JSONDecodeError as e:
-                self.sessionSettings = None
-                print('error: ')
-                print(e)
-
-        if self.sessionSettings != None:
-            return self.sessionSettings
+        self.sessionSettings = self.store.load()
+        return self.sessionSettings
+
+    def reloadSettings(self):
+        """Parse settings.json again even if it looks unchanged."""
+        self.sessionSettings = self.store.load(force=True)
+        return self.sessionSettings
         
     def regenerateSettings(self):
-        os.remove(self.SETTINGS_PATH)
-        with open(self.SETTINGS_PATH, 'w') as sFile: 
-            try:
-                temp = {"Settings": self.SETTINGS_DEFAULT}
-                json.dump(temp, sFile, indent=4)
-            except JSONDecodeError as e:
-                print(e)
+        self.sessionSettings = self.store.save(dict(self.SETTINGS_DEFAULT))
 
     def applySettings_fromMode(self, mode):
+        # A mode only overrides a few settings for the QCFx_Blur using it; they're not written to settings.json
         qualityFactor = mode[1]
+        self.loadSettings()
         if mode[0] == 0:
             newSettings = self.sessionSettings.copy()
             newSettings['otherWindowsStateMonitoring'] = False
@@ -119,31 +159,2321 @@ class QCFx:
             newSettings['desktopMonitoring'] = True
             newSettings['blurringFunction'] = qualityFactor
 
-        return self.overwriteSettings(newSettings)
+        return newSettings
 
     def applySetting(self, key, value):
-        newSetting = self.sessionSettings.copy()
+        newSetting = self.loadSettings().copy()
         newSetting[key] = value
         return self.overwriteSettings(newSetting)
 
     def overwriteSettings(self, newSettings):
-        with open(self.SETTINGS_PATH, 'w') as ovr:
+        self.sessionSettings = self.store.save(newSettings)
+        return self.sessionSettings
+
+
+# QC FX Settings store; One in-memory copy of settings.json per process, parsed again only when the file changes on disk
+class QCFx_SettingsStore:
+    _shared = {}
+    _sharedLock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path, defaults):
+        """Return the process-wide store for the settings file at path."""
+        with cls._sharedLock:
+            store = cls._shared.get(path)
+            if store is None:
+                store = cls._shared[path] = cls(path, defaults)
+            return store
+
+    def __init__(self, path, defaults):
+        self.path = path
+        self.defaults = defaults
+        self.lock = threading.Lock()
+        self.settings = None
+        self.signature = None # (mtime, size) of the file when it was last read or written
+        self.counters = {'reads': 0, 'writes': 0, 'hits': 0}
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self, force=False):
+        """Return a copy of the settings; a stat when nothing changed, a parse when the file did (or with force)."""
+        with self.lock:
+            signature = self._signature()
+            if force or self.settings is None or signature != self.signature:
+                try:
+                    with open(self.path, 'r') as file:
+                        self.settings = {**self.defaults, **json.load(file)['Settings']} # Settings files from older versions lack newer keys
+                    self.counters['reads'] += 1
+                except (OSError, JSONDecodeError, KeyError, TypeError) as e:
+                    print(f"Error reading settings, keeping the previous ones: {e}")
+                    if self.settings is None:
+                        self.settings = dict(self.defaults)
+                self.signature = signature
+            else:
+                self.counters['hits'] += 1
+            return dict(self.settings)
+
+    def save(self, settings):
+        """Write settings to the file and return them as load() would."""
+        with self.lock:
+            with open(self.path, 'w') as file:
+                json.dump({"Settings": settings}, file, indent=4)
+            self.settings = {**self.defaults, **settings}
+            self.signature = self._signature()
+            self.counters['writes'] += 1
+            return dict(self.settings)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+# QC FX Histogram; Latencies in log-spaced millisecond buckets, so recording is O(1) and percentiles stay cheap
+class QCFx_Histogram:
+    BOUNDS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+
+    def __init__(self):
+        self.buckets = [0] * len(self.BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, ms):
+        self.buckets[bisect.bisect_left(self.BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """Estimated p-th percentile (0-100) in ms, interpolated inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                low = self.BOUNDS[i - 1] if i else 0.0
+                high = min(self.BOUNDS[i], self.max)
+                return max(min(low + (high - low) * (rank - seen) / n, self.max), self.min)
+            seen += n
+        return self.max
+
+    def stats(self):
+        return {'count': self.count, 'mean': self.total / self.count if self.count else 0.0, 'min': self.min if self.count else 0.0, 'max': self.max,
+                'p50': self.percentile(50), 'p90': self.percentile(90), 'p99': self.percentile(99),
+                'buckets': {str(bound): n for bound, n in zip(self.BOUNDS, self.buckets) if n}}
+
+
+# QC FX Profiler; Process-wide timing of the pipeline stages, off by default (profiling setting). While disabled, span() hands out
+# one shared no-op context manager and count() returns at once, so the instrumented code costs an attribute check.
+class QCFx_Profiler:
+    _instance = None
+    _instanceLock = threading.Lock()
+    FORMATS = ('jsonl', 'chrome')
+
+    @classmethod
+    def shared(cls):
+        if cls._instance is None:
+            with cls._instanceLock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.local = threading.local() # Span nesting depth per thread; only outermost spans count as busy time
+        self.export = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {} # stage -> QCFx_Histogram
+            self.counters = {}
+            self.busy = {} # thread name -> seconds inside outermost spans
+            self.started = time.perf_counter()
+
+    def enable(self, path=None, format='jsonl'):
+        """Start recording; with path, every span is also appended to it as JSON lines or Chrome trace events (chrome://tracing, Perfetto)."""
+        if format not in self.FORMATS:
+            raise ValueError(f'Unknown profile format: {format}')
+        with self.lock:
+            if self.enabled and self.export is not None and self.export[0] == path and self.export[1] == format:
+                return
+            self._closeExport()
+            if path:
+                file = open(path, 'w', buffering=1024 * 1024)
+                if format == 'chrome':
+                    file.write('[\n') # The trace viewers accept an array without its closing bracket, so a crash loses nothing
+                self.export = (path, format, file)
+            if not self.enabled:
+                self.started = time.perf_counter()
+            self.enabled = True
+
+    def disable(self):
+        with self.lock:
+            self.enabled = False
+            self._closeExport()
+
+    def _closeExport(self):
+        if self.export is not None:
+            try:
+                self.export[2].close()
+            except OSError as e:
+                print(f"Error closing profile export: {e}")
+            self.export = None
+
+    def span(self, stage):
+        """Context manager timing one run of stage."""
+        if not self.enabled:
+            return _QCFX_NO_SPAN
+        return QCFx_ProfileSpan(self, stage)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, stage, start, end, outermost):
+        ms = (end - start) * 1000
+        thread = threading.current_thread()
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = QCFx_Histogram()
+            histogram.add(ms)
+            if outermost:
+                self.busy[thread.name] = self.busy.get(thread.name, 0.0) + (end - start)
+            if self.export is not None:
+                _, format, file = self.export
+                if format == 'chrome':
+                    event = {'name': stage, 'cat': 'qcfx', 'ph': 'X', 'ts': start * 1e6, 'dur': ms * 1000, 'pid': os.getpid(), 'tid': thread.ident}
+                    file.write(json.dumps(event) + ',\n')
+                else:
+                    file.write(json.dumps({'stage': stage, 'start': start, 'ms': ms, 'thread': thread.name}) + '\n')
+
+    def stats(self):
+        """Per-stage latency histograms (ms), counters (refresh triggers, dropped frames, ...) and the share of time each thread was busy."""
+        with self.lock:
+            elapsed = max(time.perf_counter() - self.started, 1e-9)
+            return {'enabled': self.enabled, 'elapsed': elapsed,
+                    'stages': {stage: histogram.stats() for stage, histogram in self.histograms.items()},
+                    'counters': dict(self.counters),
+                    'threadUtilization': {name: busy / elapsed for name, busy in self.busy.items()}}
+
+
+class QCFx_ProfileSpan:
+    __slots__ = ('profiler', 'stage', 'start', 'outermost')
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        local = self.profiler.local
+        depth = getattr(local, 'depth', 0)
+        local.depth = depth + 1
+        self.outermost = depth == 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler.local.depth -= 1
+        self.profiler.record(self.stage, self.start, end, self.outermost)
+        return False
+
+_QCFX_NO_SPAN = contextlib.nullcontext()
+
+
+# QC FX Backdrop cache; Blurred backdrops keyed by everything that went into them, in an in-memory LRU backed by files in QCFxData/cache
+class QCFx_BackdropCache:
+    _shared = {}
+    _sharedLock = threading.Lock()
+
+    @classmethod
+    def shared(cls, directory, memoryBudget=64, diskBudget=256):
+        """Return the process-wide cache for directory, so every QCFx_Blur shares one LRU."""
+        with cls._sharedLock:
+            cache = cls._shared.get(directory)
+            if cache is None:
+                cache = cls._shared[directory] = cls(directory, memoryBudget, diskBudget)
+            cache.memoryBudget = memoryBudget * 1024 * 1024
+            cache.diskBudget = diskBudget * 1024 * 1024
+            return cache
+
+    def __init__(self, directory, memoryBudget=64, diskBudget=256):
+        self.directory = directory
+        self.memoryBudget = memoryBudget * 1024 * 1024
+        self.diskBudget = diskBudget * 1024 * 1024
+
+        self.lock = threading.Lock()
+        self.entries = OrderedDict() # key -> PIL image, least recently used first
+        self.memoryBytes = 0
+        self.counters = {'memoryHits': 0, 'diskHits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(**inputs):
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def _imageBytes(image):
+        return image.width * image.height * len(image.getbands())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.png')
+
+    def get(self, key):
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+                self.counters['memoryHits'] += 1
+                return image
+
+        path = self._path(key)
+        try:
+            image = Image.open(path)
+            image.load()
+            os.utime(path) # Disk eviction is least recently used first
+        except (OSError, ValueError):
+            with self.lock:
+                self.counters['misses'] += 1
+            return None
+
+        with self.lock:
+            self.counters['diskHits'] += 1
+        self._remember(key, image)
+        return image
+
+    def put(self, key, image):
+        self._remember(key, image)
+        with self.lock:
+            self.counters['stores'] += 1
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write then rename, so another process never reads a half-written file
+            temp_path = self._path(key) + f'.{os.getpid()}.tmp'
+            image.save(temp_path, 'PNG', compress_level=1)
+            os.replace(temp_path, self._path(key))
+            self._evictDisk()
+        except OSError as e:
+            print(f"Error writing backdrop cache: {e}")
+
+    def _remember(self, key, image):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return
+            self.entries[key] = image
+            self.memoryBytes += self._imageBytes(image)
+            while self.memoryBytes > self.memoryBudget and len(self.entries) > 1:
+                _, old = self.entries.popitem(last=False)
+                self.memoryBytes -= self._imageBytes(old)
+                self.counters['evictions'] += 1
+
+    def _evictDisk(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.png'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.diskBudget:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                with self.lock:
+                    self.counters['evictions'] += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            lookups = self.counters['memoryHits'] + self.counters['diskHits'] + self.counters['misses']
+            hits = self.counters['memoryHits'] + self.counters['diskHits']
+            return {**self.counters, 'hitRate': hits / lookups if lookups else 0.0,
+                    'memoryBytes': self.memoryBytes, 'entries': len(self.entries)}
+
+
+# QC FX Shared backdrop; One process blurs, every other process on the machine maps the result read-only (sharedBackdrop setting)
+# Layout of QCFxData/shared/<key>.mmap: a header, then two RGBX slots. The producer writes the idle slot, then flips the header
+# under a sequence lock (odd while writing), so readers never see a half-written header and a slot is only reused one publish later.
+# Whoever holds QCFxData/shared/<key>.lock is the producer; the OS releases it when that process exits and a reader takes over.
+class QCFx_SharedBackdrop:
+    MAGIC = b'QCFX'
+    VERSION = 1
+    HEADER = struct.Struct('<4sIQQIII4i4iddQ') # magic, version, seq, generation, slot, width, height, rect, valid, radius, scale, slotBytes
+    HEADER_SIZE = 128
+    SEQ_OFFSET = 8
+
+    def __init__(self, directory, key):
+        self.directory = directory
+        self.key = key
+        self.path = os.path.join(directory, key + '.mmap')
+        self.lock = threading.Lock()
+        self.lockFile = None
+        self.producer = False
+        self.map = None
+        self.lastGeneration = 0 # Newest generation read or published by this process
+        self.counters = {'published': 0, 'reads': 0, 'retries': 0, 'takeovers': 0}
+
+    @staticmethod
+    def key(**inputs):
+        return 'qcfx-' + hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:20]
+
+    def isProducer(self):
+        """Return True if this process produces the backdrop, claiming the role if its previous producer exited."""
+        with self.lock:
+            if not self.producer:
+                self._claim()
+            return self.producer
+
+    def _claim(self):
+        try:
+            if self.lockFile is None: # Kept open between attempts; only the lock is retried
+                os.makedirs(self.directory, exist_ok=True)
+                self.lockFile = open(os.path.join(self.directory, self.key + '.lock'), 'a+b')
+            if os.name == 'nt':
+                import msvcrt
+                self.lockFile.seek(0)
+                msvcrt.locking(self.lockFile.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.lockFile.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError: # Another process is the producer
+            return
+
+        self.producer = True
+        if self.lastGeneration:
+            self.counters['takeovers'] += 1
+        self._closeMap() # Remapped writable on the first publish
+
+    def _openWriter(self, slotBytes):
+        # The file only ever grows; Shrinking it under a reader's mapping would fault (SIGBUS) on its next access
+        size = self.HEADER_SIZE + 2 * slotBytes
+        if self.map is not None and len(self.map) >= size:
+            return self.map
+        self._closeMap()
+        try:
+            with open(self.path, 'a+b') as file:
+                if os.fstat(file.fileno()).st_size < size:
+                    file.truncate(size)
+            with open(self.path, 'r+b') as file:
+                self.map = mmap.mmap(file.fileno(), 0)
+        except (OSError, ValueError) as e:
+            print(f"Error mapping shared backdrop: {e}")
+            return None
+        return self.map
+
+    def _openReader(self):
+        if self.map is not None:
+            # The producer grows the file when the blurred image gets bigger
+            slotBytes = self.HEADER.unpack_from(self.map, 0)[-1]
+            if len(self.map) >= self.HEADER_SIZE + 2 * slotBytes:
+                return self.map
+            self._closeMap()
+        try:
+            with open(self.path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size < self.HEADER_SIZE:
+                    return None # The producer hasn't published yet
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(self.map) < self.HEADER_SIZE + 2 * self.HEADER.unpack_from(self.map, 0)[-1]:
+            self._closeMap() # Caught mid-resize
+        return self.map
+
+    def publish(self, backdrop, radius):
+        """Write a backdrop for the other processes; only the producer calls this."""
+        image = backdrop.image if backdrop.image.mode == 'RGBX' else backdrop.image.convert('RGBX')
+        slotBytes = image.width * image.height * 4
+        with self.lock:
+            if not self.producer or self._openWriter(slotBytes) is None:
+                return False
+            fields = self.HEADER.unpack_from(self.map, 0)
+            seq, generation, slot = (fields[2], fields[3] + 1, 1 - fields[4]) if fields[0] == self.MAGIC else (0, 1, 0) # Generations keep counting across producers
+            offset = self.HEADER_SIZE + slot * slotBytes
+            # Odd before any slot byte changes. With a new slot size the idle slot can overlap the published one; Jump the sequence
+            # further so a reader of the published one retries too
+            step = 4 if fields[0] == self.MAGIC and fields[-1] != slotBytes else 2
+            struct.pack_into('<Q', self.map, self.SEQ_OFFSET, seq + step - 1)
+
+            self.map[offset:offset + slotBytes] = image.tobytes()
+            rect = (*backdrop.origin, round(image.width * backdrop.scale), round(image.height * backdrop.scale))
+            self.HEADER.pack_into(self.map, 0, self.MAGIC, self.VERSION, seq + step - 1, generation, slot, image.width, image.height,
+                                  *rect, *backdrop.valid, radius, backdrop.scale, slotBytes)
+            struct.pack_into('<Q', self.map, self.SEQ_OFFSET, seq + step)
+            self.lastGeneration = generation
+            self.counters['published'] += 1
+            return True
+
+    def generation(self):
+        """Return the generation currently published, or 0; a single header read, cheap enough to poll."""
+        with self.lock:
+            map = self._openReader()
+            if map is None:
+                return 0
+            fields = self.HEADER.unpack_from(map, 0)
+            return fields[3] if fields[0] == self.MAGIC and fields[1] == self.VERSION else 0
+
+    def read(self, derive):
+        """Map the published backdrop and return derive(image, rect, valid, radius), or None if nothing is published yet.
+
+        image is a read-only view of the shared slot, not a copy; derive must finish with it before the producer
+        starts its second publish after it, which is checked here & retried.
+        """
+        with self.lock:
+            for attempt in range(20):
+                map = self._openReader() # Remapped if a publish we retry after grew the file
+                if map is None:
+                    return None
+                seq = struct.unpack_from('<Q', map, self.SEQ_OFFSET)[0]
+                if seq % 2:
+                    self.counters['retries'] += 1
+                    time.sleep(0.001)
+                    continue
+                magic, version, _, generation, slot, width, height, *rest = self.HEADER.unpack_from(map, 0)
+                if magic != self.MAGIC or version != self.VERSION or not generation:
+                    return None
+                rect, valid, (radius, scale, slotBytes) = tuple(rest[0:4]), tuple(rest[4:8]), rest[8:]
+                offset = self.HEADER_SIZE + slot * slotBytes
+                view = memoryview(map)[offset:offset + width * height * 4]
+                image = Image.frombuffer('RGBX', (width, height), view, 'raw', 'RGBX', 0, 1)
+                result = derive(image, rect, valid, radius)
+
+                # Our slot is only rewritten by the second publish after the one we read, which makes the sequence odd first
+                if struct.unpack_from('<Q', map, self.SEQ_OFFSET)[0] - seq <= 2:
+                    self.lastGeneration = generation
+                    self.counters['reads'] += 1
+                    return result
+                self.counters['retries'] += 1
+            return None
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, 'producer': self.producer, 'generation': self.lastGeneration}
+
+    def _closeMap(self):
+        if self.map is not None:
             try:
-                temp = {"Settings": newSettings}
-                json.dump(temp, ovr, indent=4)
-            except JSONDecodeError as e:
-                print('error: ')
-                print(e)
+                self.map.close()
+            except BufferError: # An image still views it; it's unmapped once collected
+                pass
+            self.map = None
+
+    def release(self):
+        """Give up the producer role so another process takes over; isProducer() claims it again if nobody did."""
+        with self.lock:
+            self._release()
+
+    def _release(self):
+        if self.lockFile is not None:
+            self.lockFile.close() # Closing drops the lock
+            self.lockFile = None
+        self.producer = False
+
+    def close(self):
+        with self.lock:
+            self._closeMap()
+            self._release()
+
+
+# QC FX Wallpaper watcher; Tiered change detection: a cheap signature (path, mtime, size) first, a perceptual hash only when that changes
+class QCFx_WallpaperWatcher:
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.signature = None
+        self.hash = None
+        self.decoded = None # (signature, image) from the last hash, kept for the capture the change triggers so it isn't decoded twice
+        self.digestCache = None # (signature, digest)
+        self.counters = {'checks': 0, 'signatureChanges': 0, 'decodes': 0, 'changes': 0}
+
+    def check(self, keep=False):
+        """Return True if the wallpaper changed since the last check.
+
+        With keep, a new wallpaper's decoded image is held for the desktop-only capture it triggers; Otherwise it's dropped.
+        """
+        signature = self.backend.wallpaperSignature()
+        with self.lock:
+            self.counters['checks'] += 1
+            if signature is not None and signature == self.signature:
+                return False
+            self.counters['signatureChanges'] += 1
+            self.counters['decodes'] += 1
+
+        # The file was touched; only a different picture counts as a change
+        image = self.backend.wallpaperImage()
+        image.load()
+        img_hash = imagehash.average_hash(image)
+
+        with self.lock:
+            self.signature = signature
+            changed = self.hash is not None and img_hash != self.hash
+            self.decoded = (signature, image) if keep and (changed or self.hash is None) else None
+            self.hash = img_hash
+            if changed:
+                self.counters['changes'] += 1
+        return changed
+
+    def image(self):
+        """Return the current wallpaper, reusing the image decoded by the last check if the wallpaper hasn't changed since."""
+        signature = self.backend.wallpaperSignature()
+        with self.lock:
+            if signature is not None and self.decoded is not None and self.decoded[0] == signature:
+                image = self.decoded[1]
+                self.decoded = None
+                return image
+        return self.backend.wallpaperImage()
+
+    def discard(self):
+        """Drop the image the last check kept; A refresh that hit the backdrop cache never asked for it."""
+        with self.lock:
+            self.decoded = None
+
+    def digest(self):
+        """Content hash of the current wallpaper, recomputed only when its signature changes."""
+        signature = self.backend.wallpaperSignature()
+        with self.lock:
+            if signature is not None and self.digestCache is not None and self.digestCache[0] == signature:
+                return self.digestCache[1]
+        digest = self.backend.wallpaperDigest()
+        with self.lock:
+            self.digestCache = (signature, digest)
+        return digest
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+# QC FX Capture backends; Everything QCFx_Blur needs from the desktop (screenshots, wallpaper, screen geometry & windows) goes through one of these
+# QC FX Screen; One monitor of the virtual desktop, in physical pixels (the coordinates captures & window rects use)
+class QCFx_Screen:
+    def __init__(self, x, y, width, height, scale=1.0):
+        self.rect = (x, y, width, height)
+        self.scale = scale # Device pixel ratio (1.5 on a 150% monitor)
+        self.key = (x, y, width, height, scale) # Backdrops are cached per screen; a new geometry or scale factor is a new screen
+
+    def bounds(self):
+        x, y, width, height = self.rect
+        return (x, y, x + width, y + height)
+
+    @staticmethod
+    def desktop(screens):
+        """Bounding rectangle (x, y, width, height) of the whole virtual desktop."""
+        x0, y0 = min(s.rect[0] for s in screens), min(s.rect[1] for s in screens)
+        x1, y1 = max(s.bounds()[2] for s in screens), max(s.bounds()[3] for s in screens)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def __repr__(self):
+        return f'QCFx_Screen{self.key}'
+
+
+class QCFx_CaptureBackend:
+    """Interface for desktop capture. Subclass this to run QCFx on another platform or without a display."""
+
+    def screenSize(self):
+        """Return (width, height) of the primary screen."""
+        raise NotImplementedError
+
+    def screens(self):
+        """Return the monitors as QCFx_Screen, primary first; the default is the primary screen alone, at scale 1."""
+        return [QCFx_Screen(0, 0, *self.screenSize())]
+
+    def screenshot(self, region=None):
+        """Return a PIL image of the primary screen, or of region (x, y, width, height) in virtual desktop coordinates (any monitor)."""
+        raise NotImplementedError
+
+    def wallpaperPath(self):
+        """Return the path of the current desktop wallpaper (or None if it has none)."""
+        raise NotImplementedError
+
+    def wallpaperImage(self):
+        """Return the current desktop wallpaper as a PIL image."""
+        return Image.open(self.wallpaperPath())
+
+    def wallpaperSignature(self):
+        """Return a cheap value that changes whenever the wallpaper may have changed (path, mtime & size of its file)."""
+        path = self.wallpaperPath()
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return (path, None, None)
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def watchWallpaper(self, callback):
+        """Call callback whenever the OS reports a wallpaper change; return a function that stops watching, or None if unsupported."""
+        return None
+
+    def wallpaperDigest(self):
+        """Return a content hash of the current wallpaper, used to key the blurred backdrop cache."""
+        path = self.wallpaperPath()
+        if path:
+            with open(path, 'rb') as file:
+                return hashlib.sha1(file.read()).hexdigest()
+        img = self.wallpaperImage()
+        return hashlib.sha1(repr((img.mode, img.size)).encode() + img.tobytes()).hexdigest()
+
+    def foregroundWindow(self):
+        """Return the handle of the foreground window."""
+        raise NotImplementedError
+
+    def enumWindows(self):
+        """Return a list of all top-level window handles, topmost first."""
+        raise NotImplementedError
+
+    def isWindow(self, hwnd):
+        raise NotImplementedError
+
+    def isIconic(self, hwnd):
+        """Return True if the window is minimized."""
+        raise NotImplementedError
+
+    def isWindowVisible(self, hwnd):
+        return True
+
+    def windowRect(self, hwnd):
+        """Return the window's (x, y, width, height) on screen, or None if unknown (it's then assumed to cover the whole screen)."""
+        return None
+
+
+# WORKES FOR WINDOWS ONLY
+class QCFx_Win32Backend(QCFx_CaptureBackend):
+    SPI_GETDESKWALLPAPER = 0x0073
+    CAPTUREBLT = 0x40000000 # Include layered (translucent) windows, as a screenshot would
+
+    def __init__(self):
+        if pyautogui is None or win32gui is None:
+            raise RuntimeError('QCFx_Win32Backend needs pyautogui & pywin32 and an attached display')
+
+    def screenSize(self):
+        return tuple(pyautogui.size())
+
+    def screens(self):
+        # Physical rects, since Qt makes the process per-monitor DPI aware; primary first
+        import win32api
+        MONITORINFOF_PRIMARY = 0x1
+        screens = []
+        for monitor, _, _ in win32api.EnumDisplayMonitors():
+            info = win32api.GetMonitorInfo(monitor)
+            left, top, right, bottom = info['Monitor']
+            screen = QCFx_Screen(left, top, right - left, bottom - top, self._monitorScale(monitor))
+            if info['Flags'] & MONITORINFOF_PRIMARY:
+                screens.insert(0, screen)
+            else:
+                screens.append(screen)
+        return screens or super().screens()
+
+    @staticmethod
+    def _monitorScale(monitor):
+        MDT_EFFECTIVE_DPI = 0
+        dpi_x, dpi_y = ctypes.c_uint(), ctypes.c_uint()
+        try:
+            ctypes.windll.shcore.GetDpiForMonitor(ctypes.c_void_p(int(monitor)), MDT_EFFECTIVE_DPI, ctypes.byref(dpi_x), ctypes.byref(dpi_y))
+        except (AttributeError, OSError): # Windows 7 has no shcore; every monitor has the system DPI there
+            return 1.0
+        return dpi_x.value / 96 if dpi_x.value else 1.0
+
+    def screenshot(self, region=None):
+        if region is None:
+            region = (0, 0, *self.screenSize())
+        x, y, width, height = region
+        # BitBlt just the region out of the desktop DC, which spans every monitor (negative coordinates too); pyautogui only sees the
+        # primary monitor, and ImageGrab(all_screens=True) copies the whole virtual desktop before it crops
+        import win32ui, win32con
+        desktop = win32gui.GetDesktopWindow()
+        desktop_dc = win32gui.GetWindowDC(desktop)
+        source = win32ui.CreateDCFromHandle(desktop_dc)
+        memory = source.CreateCompatibleDC()
+        bitmap = win32ui.CreateBitmap()
+        try:
+            bitmap.CreateCompatibleBitmap(source, width, height)
+            memory.SelectObject(bitmap)
+            memory.BitBlt((0, 0), (width, height), source, (x, y), win32con.SRCCOPY | self.CAPTUREBLT)
+            bits = bitmap.GetBitmapBits(True)
+        finally:
+            win32gui.DeleteObject(bitmap.GetHandle())
+            memory.DeleteDC()
+            source.DeleteDC()
+            win32gui.ReleaseDC(desktop, desktop_dc)
+        return Image.frombuffer('RGB', (width, height), bits, 'raw', 'BGRX', 0, 1)
+
+    def wallpaperPath(self):
+        wallpaper_path_bin = ctypes.create_string_buffer(260)
+        ctypes.windll.user32.SystemParametersInfoA(self.SPI_GETDESKWALLPAPER, 260, wallpaper_path_bin, 0)
+        return wallpaper_path_bin.value.decode()
+
+    def watchWallpaper(self, callback):
+        # The wallpaper setting lives in HKCU\Control Panel\Desktop; wait for the registry to report a change to it
+        import winreg
+        from ctypes import wintypes
+        REG_NOTIFY_CHANGE_LAST_SET = 0x4
+        WAIT_OBJECT_0 = 0
+
+        advapi32, kernel32 = ctypes.windll.advapi32, ctypes.windll.kernel32
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        advapi32.RegNotifyChangeKeyValue.argtypes = [wintypes.HKEY, wintypes.BOOL, wintypes.DWORD, wintypes.HANDLE, wintypes.BOOL]
+        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Control Panel\Desktop', 0, winreg.KEY_NOTIFY)
+        event = kernel32.CreateEventW(None, False, False, None)
+        stopped = threading.Event()
+
+        def watch():
+            try:
+                while not stopped.is_set():
+                    if advapi32.RegNotifyChangeKeyValue(key.handle, False, REG_NOTIFY_CHANGE_LAST_SET, event, True) != 0:
+                        return
+                    # Wake up every second to notice stop()
+                    while not stopped.is_set():
+                        if kernel32.WaitForSingleObject(event, 1000) == WAIT_OBJECT_0:
+                            callback()
+                            break
+            finally:
+                kernel32.CloseHandle(event)
+                key.Close()
+
+        thread = threading.Thread(target=watch)
+        thread.daemon = True
+        thread.start()
+        return stopped.set
+
+    def foregroundWindow(self):
+        return win32gui.GetForegroundWindow()
+
+    def enumWindows(self):
+        windows = []
+        win32gui.EnumWindows(lambda hwnd, _: windows.append(hwnd), None) # Z order, topmost first
+        return windows
+
+    def isWindow(self, hwnd):
+        return win32gui.IsWindow(hwnd)
+
+    def isIconic(self, hwnd):
+        return win32gui.IsIconic(hwnd)
+
+    def isWindowVisible(self, hwnd):
+        return win32gui.IsWindowVisible(hwnd)
+
+    def windowRect(self, hwnd):
+        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+        return (left, top, right - left, bottom - top)
+
+
+class QCFx_SyntheticBackend(QCFx_CaptureBackend):
+    """
+    Headless backend that replays recorded screens & scripted window events, for profiling and CI.
+
+    screens   : list of frames (PIL images, NumPy arrays or image file paths) of the whole virtual desktop; screenshot() returns the current one
+    wallpaper : frame used as the desktop wallpaper (defaults to the first screen); every monitor shows it stretched
+    monitors  : list of (x, y, width, height[, scale]), primary first; defaults to one monitor the size of the frames
+    windows   : dict of hwnd -> {'iconic': bool, 'visible': bool, 'rect': (x, y, width, height)}, or a list of handles; topmost first
+    events    : list of (seconds, action, arg) played back relative to start(); actions are
+                'frame' (arg: index), 'wallpaper' (arg: frame), 'focus' (raises it), 'open' (on top), 'close', 'minimize', 'restore',
+                'show', 'hide' (arg: hwnd), 'move' (arg: (hwnd, rect))
+    """
+
+    def __init__(self, screens=None, wallpaper=None, size=None, windows=None, events=None, foreground=None, monitors=None):
+        self.lock = threading.RLock()
+
+        self.monitors = [QCFx_Screen(*m) for m in monitors] if monitors else None
+        desktop = QCFx_Screen.desktop(self.monitors) if self.monitors else None
+        self.frames = [self._toImage(s) for s in (screens or [])]
+        if not self.frames:
+            self.frames = [Image.new('RGB', size or (desktop[2:] if desktop else (1920, 1080)), (32, 64, 128))]
+        self.size = tuple(size) if size else desktop[2:] if desktop else self.frames[0].size
+        self.origin = desktop[:2] if desktop else (0, 0) # Virtual desktop position of the frames' top-left pixel
+        if self.monitors is None:
+            self.monitors = [QCFx_Screen(0, 0, *self.size)]
+        self.frameIndex = 0
+
+        self.wallpaper = self._toImage(wallpaper) if wallpaper is not None else self.frames[0]
+        self.wallpaperVersion = 0
+        self.digestVersion = None
+        self.wallpaperCallbacks = []
+
+        if windows is None:
+            windows = {}
+        elif not isinstance(windows, dict):
+            windows = {hwnd: {} for hwnd in windows}
+        self.windows = {hwnd: {'iconic': False, 'visible': True, 'rect': None, **state} for hwnd, state in windows.items()} # Stacking order, topmost first
+        self.foreground = foreground if foreground is not None else next(iter(self.windows), 0)
+
+        self.events = sorted(events or [], key=lambda e: e[0])
+        self.start()
+
+    @staticmethod
+    def _toImage(src):
+        if isinstance(src, Image.Image):
+            return src
+        if isinstance(src, np.ndarray):
+            return Image.fromarray(src)
+        img = Image.open(src)
+        img.load()
+        return img
+
+    def start(self):
+        """(Re)start event playback from t=0."""
+        with self.lock:
+            self.startTime = time.monotonic()
+            self.eventIndex = 0
+
+    def step(self):
+        """Apply the next scripted event immediately, regardless of its timestamp. Returns False when none are left."""
+        with self.lock:
+            if self.eventIndex >= len(self.events):
+                return False
+            self._apply(self.events[self.eventIndex])
+            self.eventIndex += 1
+            return True
+
+    def _pump(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.startTime
+            while self.eventIndex < len(self.events) and self.events[self.eventIndex][0] <= elapsed:
+                self._apply(self.events[self.eventIndex])
+                self.eventIndex += 1
+
+    def _apply(self, event):
+        _, action, arg = event
+        if action == 'frame':
+            self.frameIndex = arg % len(self.frames)
+        elif action == 'wallpaper':
+            self.wallpaper = self._toImage(arg)
+            self.wallpaperVersion += 1
+            for callback in list(self.wallpaperCallbacks):
+                callback()
+        elif action == 'focus':
+            self.foreground = arg
+            if arg in self.windows:
+                self._raise(arg, self.windows.pop(arg))
+        elif action == 'open':
+            self._raise(arg, {'iconic': False, 'visible': True, 'rect': None})
+        elif action == 'close':
+            self.windows.pop(arg, None)
+        elif action in ('minimize', 'restore'):
+            self.windows.setdefault(arg, {'visible': True, 'rect': None})['iconic'] = action == 'minimize'
+        elif action in ('show', 'hide'):
+            self.windows.setdefault(arg, {'iconic': False, 'rect': None})['visible'] = action == 'show'
+        elif action == 'move':
+            hwnd, rect = arg
+            self.windows.setdefault(hwnd, {'iconic': False, 'visible': True})['rect'] = tuple(rect)
+        else:
+            raise ValueError(f'Unknown synthetic event: {action}')
+
+    def _raise(self, hwnd, state):
+        self.windows = {hwnd: state, **self.windows}
+
+    def screenSize(self):
+        return self.monitors[0].rect[2:]
+
+    def screens(self):
+        return list(self.monitors)
+
+    def screenshot(self, region=None):
+        self._pump()
+        with self.lock:
+            frame = self.frames[self.frameIndex]
+        if frame.size != self.size:
+            frame = frame.resize(self.size, Image.BILINEAR)
+        x, y, w, h = region if region is not None else self.monitors[0].rect
+        x, y = x - self.origin[0], y - self.origin[1]
+        return frame.crop((x, y, x + w, y + h))
+
+    def wallpaperPath(self):
+        self._pump()
+        return getattr(self.wallpaper, 'filename', None) or None
+
+    def wallpaperImage(self):
+        self._pump()
+        with self.lock:
+            return self.wallpaper.copy()
+
+    def wallpaperSignature(self):
+        self._pump()
+        return ('synthetic', self.wallpaperVersion)
+
+    def watchWallpaper(self, callback):
+        # Nothing else may be polling the backend, so keep the scripted events playing while someone is watching
+        stopped = threading.Event()
+
+        def playback():
+            while not stopped.wait(0.05):
+                self._pump()
+
+        with self.lock:
+            self.wallpaperCallbacks.append(callback)
+        thread = threading.Thread(target=playback)
+        thread.daemon = True
+        thread.start()
+
+        def stop():
+            stopped.set()
+            with self.lock:
+                if callback in self.wallpaperCallbacks:
+                    self.wallpaperCallbacks.remove(callback)
+        return stop
+
+    def wallpaperDigest(self):
+        self._pump()
+        with self.lock:
+            if self.digestVersion != self.wallpaperVersion:
+                img = self.wallpaper
+                self.digest = hashlib.sha1(repr((img.mode, img.size)).encode() + img.tobytes()).hexdigest()
+                self.digestVersion = self.wallpaperVersion
+            return self.digest
+
+    def foregroundWindow(self):
+        self._pump()
+        return self.foreground
+
+    def enumWindows(self):
+        self._pump()
+        with self.lock:
+            return list(self.windows)
+
+    def isWindow(self, hwnd):
+        with self.lock:
+            return hwnd in self.windows
+
+    def isIconic(self, hwnd):
+        with self.lock:
+            return self.windows.get(hwnd, {}).get('iconic', False)
+
+    def isWindowVisible(self, hwnd):
+        with self.lock:
+            return self.windows.get(hwnd, {}).get('visible', True)
+
+    def windowRect(self, hwnd):
+        with self.lock:
+            return self.windows.get(hwnd, {}).get('rect')
+
+
+# QC FX Window index; Snapshot of the top-level windows (rect, z-order, visibility, iconic), diffed tick to tick into the screen regions that changed
+class QCFx_WindowIndex:
+    def __init__(self, backend):
+        self.backend = backend # Anything with the window methods of QCFx_CaptureBackend; a fake one works for tests
+        self.windows = None # hwnd -> (rect, z, visible, iconic, measured), z = 0 for the topmost window; measured is False where the backend gave no rect
+        self.counters = {'ticks': 0, 'changedTicks': 0, 'regions': 0}
+
+    def snapshot(self):
+        screen = QCFx_Screen.desktop(self.backend.screens())
+        windows = {}
+        for z, hwnd in enumerate(self.backend.enumWindows()):
+            try:
+                if not self.backend.isWindow(hwnd):
+                    continue
+                rect = self.backend.windowRect(hwnd)
+                windows[hwnd] = (tuple(rect) if rect is not None else screen, z, bool(self.backend.isWindowVisible(hwnd)), bool(self.backend.isIconic(hwnd)), rect is not None)
+            except Exception as e:
+                print(f"Error checking window {hwnd}: {e}")
+        return windows
+
+    def update(self, ignore=()):
+        """Take a new snapshot; returns the regions that changed since the previous one (none on the first call)."""
+        windows = self.snapshot()
+        regions = self.diff(self.windows, windows, ignore) if self.windows is not None else []
+        self.windows = windows
+        self.counters['ticks'] += 1
+        if regions:
+            self.counters['changedTicks'] += 1
+            self.counters['regions'] += len(regions)
+        return regions
+
+    @staticmethod
+    def diff(old, new, ignore=()):
+        """Screen rectangles (x, y, width, height) whose content may differ between two snapshots; windows in ignore don't count."""
+        def shown(state):
+            return state is not None and state[2] and not state[3]
+
+        regions = []
+        common = []
+        for hwnd in old.keys() | new.keys():
+            if hwnd in ignore:
+                continue
+            before, after = old.get(hwnd), new.get(hwnd)
+            if shown(before) and shown(after) and before[0] == after[0]:
+                common.append(hwnd) # Same place; only a change of stacking order can still show
+                continue
+            # Opened, closed, moved, resized, shown, hidden, minimized or restored; A window hidden throughout doesn't matter
+            if shown(before):
+                regions.append(before[0])
+            if shown(after):
+                regions.append(after[0])
+
+        # Absolute z changes whenever anything above opens or closes, so compare the relative order of the windows that stayed,
+        # and only where two of them overlap
+        if sorted(common, key=lambda h: old[h][1]) != sorted(common, key=lambda h: new[h][1]):
+            for i, a in enumerate(common):
+                for b in common[i + 1:]:
+                    if (old[a][1] < old[b][1]) != (new[a][1] < new[b][1]):
+                        overlap = QCFx_WindowIndex.intersection(old[a][0], old[b][0])
+                        if overlap is not None:
+                            regions.append(overlap)
+        return regions
+
+    @staticmethod
+    def intersection(a, b):
+        x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+        x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+        return (x0, y0, x1 - x0, y1 - y0) if x1 > x0 and y1 > y0 else None
+
+    @staticmethod
+    def touches(region, regions):
+        """True if any of regions intersects region."""
+        return any(QCFx_WindowIndex.intersection(region, r) is not None for r in regions)
+
+    @staticmethod
+    def subtract(a, b):
+        """The parts of rectangle a outside rectangle b, as up to four rectangles."""
+        overlap = QCFx_WindowIndex.intersection(a, b)
+        if overlap is None:
+            return [a]
+        ax, ay, aw, ah = a
+        ox, oy, ow, oh = overlap
+        pieces = [(ax, ay, aw, oy - ay), (ax, oy + oh, aw, ay + ah - oy - oh), (ax, oy, ox - ax, oh), (ox + ow, oy, ax + aw - ox - ow, oh)]
+        return [p for p in pieces if p[2] > 0 and p[3] > 0]
+
+    def covered(self, hwnd):
+        """True if, as of the last update, the shown windows above hwnd hide all of it; False if hwnd isn't known."""
+        state = (self.windows or {}).get(hwnd)
+        if state is None:
+            return False
+        visible = [state[0]]
+        # Only windows with a real rect count; one the backend can't place may well not cover anything
+        for rect, z, shown, iconic, measured in self.windows.values():
+            if z < state[1] and shown and not iconic and measured:
+                visible = [piece for part in visible for piece in self.subtract(part, rect)]
+                if not visible:
+                    return True
+        return False
+
+    def stats(self):
+        return {**self.counters, 'windows': len(self.windows or ())}
+
+
+# QC FX Fast blur kernels; Vectorized NumPy blurs whose cost does not grow with the radius (selected by the 'blurKernel' setting)
+class QCFx_FastBlur:
+    KERNELS = ('gaussian', 'box', 'stack', 'kawase')
+
+    @staticmethod
+    def blur(img, kernel, radius):
+        """Blur a PIL image; radius is the Gaussian standard deviation, as for ImageFilter.GaussianBlur."""
+        if kernel == 'gaussian' or radius <= 0:
+            return img.filter(ImageFilter.GaussianBlur(radius=radius))
+
+        a = np.asarray(img, dtype=np.float32)
+        if a.ndim == 2:
+            a = a[:, :, None]
+
+        if kernel == 'box':
+            a = QCFx_FastBlur.box(a, radius)
+        elif kernel == 'stack':
+            a = QCFx_FastBlur.stack(a, radius)
+        elif kernel == 'kawase':
+            a = QCFx_FastBlur.kawase(a, radius)
+        else:
+            raise ValueError(f'Unknown blurKernel: {kernel}')
+
+        a = np.clip(a + 0.5, 0, 255).astype(np.uint8)
+        return Image.fromarray(a[:, :, 0] if img.mode == 'L' else a, img.mode)
+
+    @staticmethod
+    def support(kernel, radius):
+        """Pixels a blurred pixel depends on in each direction, or None if the kernel can't be evaluated on a part of the image."""
+        if radius <= 0:
+            return 0
+        if kernel == 'gaussian': # PIL: three extended box passes of radius ~sigma
+            return int(math.ceil(3 * radius)) + 4
+        if kernel == 'box':
+            return sum(width // 2 for width in QCFx_FastBlur._gaussBoxes(radius))
+        if kernel == 'stack':
+            return max(int(round((1 + 6 * radius * radius) ** 0.5 - 1)), 1) + 1
+        return None # kawase: its pyramid depth depends on the image size
+
+    @staticmethod
+    def _axisSlice(axis, start, stop, step=None):
+        return (slice(None),) * axis + (slice(start, stop, step),)
+
+    @staticmethod
+    def _edgePad(a, before, after, axis):
+        pad = [(0, 0)] * a.ndim
+        pad[axis] = (before, after)
+        return np.pad(a, pad, mode='edge')
+
+    @staticmethod
+    def _boxPass(a, lo, hi, axis):
+        # Mean over the window [i-lo, i+hi] along axis via a running sum, with edge pixels extended (like PIL)
+        sl = QCFx_FastBlur._axisSlice
+        n = a.shape[axis]
+        width = lo + hi + 1
+        c = np.cumsum(QCFx_FastBlur._edgePad(a, lo + 1, hi, axis), axis=axis, dtype=np.float32)
+        out = c[sl(axis, width, width + n)] - c[sl(axis, 0, n)]
+        out *= 1.0 / width
+        return out
+
+    @staticmethod
+    def _gaussBoxes(sigma, n=3):
+        # Box widths whose n-fold convolution has the variance of a Gaussian with this sigma
+        w_ideal = (12 * sigma * sigma / n + 1) ** 0.5
+        wl = int(w_ideal)
+        if wl % 2 == 0:
+            wl -= 1
+        wu = wl + 2
+        m = round((12 * sigma * sigma - n * wl * wl - 4 * n * wl - 3 * n) / (-4 * wl - 4))
+        return [wl if i < m else wu for i in range(n)]
+
+    @staticmethod
+    def box(a, sigma):
+        """Three-pass box approximation of a Gaussian on an (H, W, C) float array."""
+        for width in QCFx_FastBlur._gaussBoxes(sigma):
+            r = max(width // 2, 0)
+            if r == 0:
+                continue
+            a = QCFx_FastBlur._boxPass(a, r, r, 0)
+            a = QCFx_FastBlur._boxPass(a, r, r, 1)
+        return a
+
+    @staticmethod
+    def stack(a, sigma):
+        """Stack blur (triangular kernel) on an (H, W, C) float array, sized to match the Gaussian's variance."""
+        # Two box passes of width r+1, mirrored, convolve into the triangle of radius r
+        r = max(int(round((1 + 6 * sigma * sigma) ** 0.5 - 1)), 1)
+        lo, hi = r // 2, r - r // 2
+        for axis in (0, 1):
+            a = QCFx_FastBlur._boxPass(a, lo, hi, axis)
+            a = QCFx_FastBlur._boxPass(a, hi, lo, axis)
+        return a
+
+    @staticmethod
+    def _kawaseDown(a):
+        # Dual filter downsample: 2x2 block sum at the centre (weight 4) and at the four diagonal neighbours
+        h, w = a.shape[0], a.shape[1]
+        p = np.pad(a, ((1, 1 + h % 2), (1, 1 + w % 2), (0, 0)), mode='edge')
+        centre = p[1:-1:2, 1:-1:2] + p[2:-1:2, 1:-1:2] + p[1:-1:2, 2:-1:2] + p[2:-1:2, 2:-1:2]
+        corners = p[0::2, 0::2] + p[1::2, 0::2] + p[0::2, 1::2] + p[1::2, 1::2]
+        diag = corners[:-1, :-1] + corners[:-1, 1:] + corners[1:, :-1] + corners[1:, 1:]
+        diag *= 0.25
+        centre += diag
+        centre *= 0.125
+        return centre
+
+    @staticmethod
+    def _kawaseUp(a, shape):
+        # Dual filter upsample: bilinear 2x along each axis (each output pixel is 3/4 nearest + 1/4 next source pixel)
+        sl = QCFx_FastBlur._axisSlice
+        for axis in (0, 1):
+            n = a.shape[axis]
+            p = QCFx_FastBlur._edgePad(a, 1, 1, axis)
+            prev, cur, nxt = p[sl(axis, 0, n)], p[sl(axis, 1, n + 1)], p[sl(axis, 2, n + 2)]
+            out_shape = list(a.shape)
+            out_shape[axis] = n * 2
+            out = np.empty(out_shape, dtype=np.float32)
+            out[sl(axis, 0, None, 2)] = cur * 0.75 + prev * 0.25
+            out[sl(axis, 1, None, 2)] = cur * 0.75 + nxt * 0.25
+            a = out[sl(axis, 0, shape[axis])]
+        return a
+
+    @staticmethod
+    def kawase(a, sigma):
+        """Dual-filter (Kawase) pyramid on an (H, W, C) float array; the remaining blur is done by a box pass at the smallest level."""
+        levels = 0
+        while sigma / (2 ** (levels + 1)) >= 1.5 and min(a.shape[0], a.shape[1]) >> (levels + 1) >= 4:
+            levels += 1
+
+        shapes = []
+        for _ in range(levels):
+            shapes.append(a.shape)
+            a = QCFx_FastBlur._kawaseDown(a)
+
+        # Each down/up level contributes roughly one source pixel of sigma per 2**level; the rest comes from the box pass
+        residual = (max(sigma * sigma - (2 ** levels) ** 2 * 0.75, 0.0)) ** 0.5 / (2 ** levels)
+        if residual >= 0.5:
+            a = QCFx_FastBlur.box(a, residual)
+
+        for shape in reversed(shapes):
+            a = QCFx_FastBlur._kawaseUp(a, shape)
+        return a
+
+
+# QC FX Blur engine; Blurs in worker processes (blurWorkers setting), so the GUI thread keeps the GIL and a large backdrop is split
+# into horizontal bands blurred in parallel. Pixels go through two shared memory blocks; Only band coordinates are pickled.
+class QCFx_BlurEngine:
+    _shared = {}
+    _sharedLock = threading.Lock()
+
+    @classmethod
+    def shared(cls, workers):
+        """Return the process-wide engine with this many workers, starting it on first use."""
+        with cls._sharedLock:
+            engine = cls._shared.get(workers)
+            if engine is None:
+                engine = cls._shared[workers] = cls(workers)
+            return engine
+
+    @classmethod
+    def closeAll(cls):
+        with cls._sharedLock:
+            for engine in cls._shared.values():
+                engine.close()
+            cls._shared.clear()
+
+    def __init__(self, workers):
+        self.workers = max(int(workers), 1)
+        self.lock = threading.Lock()
+        self.blocks = {} # 'source' / 'result' -> SharedMemory, reused while images keep their size
+        self.counters = {'blurs': 0, 'bands': 0, 'fallbacks': 0, 'restarts': 0}
+        self.pool = self._startPool()
+
+    def _startPool(self):
+        # spawn everywhere, as on Windows; forking a process that runs Qt & monitor threads isn't safe
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        for _ in range(self.workers): # Start the workers now, rather than on the first capture
+            pool.submit(int)
+        return pool
+
+    @staticmethod
+    def plan(height, kernel, radius, bands):
+        """Split height rows into bands; returns [(top, bottom, row0, row1)], rows [row0, row1) are kept from the blur of [top, bottom)."""
+        halo = QCFx_FastBlur.support(kernel, radius)
+        if halo is None: # Not separable into bands
+            return [(0, height, 0, height)]
+        # A band takes as long as its own rows plus the halo on both sides, so more bands keep cutting the latency (at the cost of
+        # blurring the halos twice) until a band's own rows shrink to a fraction of its halo
+        bands = max(min(bands, height // max(halo // 2, 32)), 1)
+        edges = [height * i // bands for i in range(bands + 1)]
+        return [(max(row0 - halo, 0), min(row1 + halo, height), row0, row1) for row0, row1 in zip(edges, edges[1:])]
+
+    @staticmethod
+    def _blurBand(source, result, shape, mode, top, bottom, row0, row1, kernel, radius):
+        # Runs in a worker process
+        source_block = shared_memory.SharedMemory(name=source)
+        result_block = shared_memory.SharedMemory(name=result)
+        try:
+            pixels = np.ndarray(shape, np.uint8, source_block.buf)
+            band = Image.fromarray(pixels[top:bottom].copy(), mode)
+            del pixels
+            blurred = np.asarray(QCFx_FastBlur.blur(band, kernel, radius))
+            out = np.ndarray(shape, np.uint8, result_block.buf)
+            out[row0:row1] = blurred[row0 - top:row1 - top]
+            del out
+        finally:
+            source_block.close()
+            result_block.close()
+        return row1 - row0
+
+    def _block(self, name, size):
+        block = self.blocks.get(name)
+        if block is None or block.size < size:
+            if block is not None:
+                block.close()
+                block.unlink()
+            block = self.blocks[name] = shared_memory.SharedMemory(create=True, size=size)
+        return block
+
+    def blur(self, img, kernel, radius, bands=0):
+        """Same result as QCFx_FastBlur.blur; bands=0 uses one band per worker."""
+        if radius <= 0:
+            return img
+        pixels = np.asarray(img)
+        shape = pixels.shape
+        with self.lock:
+            try:
+                source = self._block('source', pixels.nbytes)
+                result = self._block('result', pixels.nbytes)
+                view = np.ndarray(shape, np.uint8, source.buf)
+                view[...] = pixels
+                del view
+
+                plan = self.plan(shape[0], kernel, radius, bands or self.workers)
+                futures = [self.pool.submit(self._blurBand, source.name, result.name, shape, img.mode, *band, kernel, radius) for band in plan]
+                for future in futures:
+                    future.result()
+
+                view = np.ndarray(shape, np.uint8, result.buf)
+                out = Image.fromarray(view.copy(), img.mode)
+                del view
+                self.counters['blurs'] += 1
+                self.counters['bands'] += len(plan)
+                return out
+            except (OSError, BrokenProcessPool, RuntimeError) as e:
+                print(f"Blur workers unavailable, blurring in process: {e}")
+                self.counters['fallbacks'] += 1
+                if isinstance(e, BrokenProcessPool): # A worker died; the pool won't take work again, start a new one for the next capture
+                    self.pool.shutdown(wait=False, cancel_futures=True)
+                    self.pool = self._startPool()
+                    self.counters['restarts'] += 1
+        return QCFx_FastBlur.blur(img, kernel, radius)
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, 'workers': self.workers}
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            for block in self.blocks.values():
+                block.close()
+                block.unlink()
+            self.blocks.clear()
+
+atexit.register(QCFx_BlurEngine.closeAll)
+
+
+# QC FX Refresh scheduler; Merges refresh requests from all the monitors and runs at most one capture at a time
+class QCFx_RefreshScheduler:
+    def __init__(self, refresh, coalesceWindow=150):
+        self.refresh = refresh
+        self.condition = threading.Condition()
+        self.setCoalesceWindow(coalesceWindow)
+
+        self.pending = False
+        self.targets = None
+        self.stopped = False
+        self.firstRequestTime = 0
+        self.lastRequestTime = 0
+        self.counters = {'requested': 0, 'coalesced': 0, 'executed': 0, 'dropped': 0}
+        self.sources = {}
+
+        self.thread = threading.Thread(target=self._run, name='QCFx-refresh')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def setCoalesceWindow(self, coalesceWindow):
+        # A steady stream of requests can't postpone a refresh forever; run after at most 4 windows
+        self.coalesceWindow = coalesceWindow / 1000
+        self.maxDelay = self.coalesceWindow * 4
+
+    def request(self, source=None, targets=None):
+        """Ask for a refresh of targets (None means everything); Requests arriving before the refresh starts are merged into it."""
+        with self.condition:
+            now = time.monotonic()
+            self.counters['requested'] += 1
+            self.sources[source] = self.sources.get(source, 0) + 1
+            QCFx_Profiler.shared().count(f'trigger.{source}')
+            if self.pending:
+                self.counters['coalesced'] += 1
+                self.targets = None if self.targets is None or targets is None else self.targets | set(targets)
+            else:
+                self.pending = True
+                self.firstRequestTime = now
+                self.targets = None if targets is None else set(targets)
+            self.lastRequestTime = now
+            self.condition.notify()
+
+    def drop(self):
+        """Record a refresh whose result was discarded because a newer one had already been committed."""
+        with self.condition:
+            self.counters['dropped'] += 1
+        QCFx_Profiler.shared().count('droppedBackdrops')
+
+    def stats(self):
+        with self.condition:
+            return {**self.counters, 'sources': dict(self.sources)}
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+
+                # Debounce; wait for a quiet coalesceWindow, but no longer than maxDelay after the first request
+                while not self.stopped:
+                    deadline = min(self.lastRequestTime + self.coalesceWindow, self.firstRequestTime + self.maxDelay)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                if self.stopped:
+                    return
+                self.pending = False
+                targets, self.targets = self.targets, None
+                self.counters['executed'] += 1
+
+            try:
+                self.refresh(targets)
+            except Exception as e:
+                print(f"Error in scheduled refresh: {e}")
+
+
+# QC FX Dirty tiles; Per-tile fingerprints of the last capture, so a refresh can re-blur only what changed since (incrementalBlur setting)
+class QCFx_DirtyTiles:
+    def __init__(self, tileSize=64):
+        self.tileSize = max(int(tileSize) // 8 * 8, 8) # Tile rows are read as 8 byte words
+        self.weights = {} # channels -> random odd multipliers, one per word of a tile
+        self.previous = {} # slot (the screen) -> (capture rectangle, blur settings, its fingerprints, its blurred image)
+        self.counters = {'full': 0, 'incremental': 0, 'unchanged': 0, 'tiles': 0, 'dirtyTiles': 0}
+
+    def fingerprint(self, image):
+        """A (rows, columns) array with one 64 bit fingerprint per tile: a weighted sum of its 8 byte words, so any single change shows."""
+        a = np.asarray(image)
+        t = self.tileSize
+        height, width = a.shape[0], a.shape[1]
+        channels = a.shape[2] if a.ndim == 3 else 1
+        a = a.reshape(height, width * channels)
+        if height % t or width % t:
+            a = np.pad(a, ((0, -height % t), (0, (-width % t) * channels)))
+
+        words = t * channels // 8
+        weights = self.weights.get(channels)
+        if weights is None:
+            weights = self.weights[channels] = np.random.default_rng(channels).integers(0, 2 ** 63, (1, t, 1, words), dtype=np.uint64) * 2 + 1
+        tiles = np.ascontiguousarray(a).view(np.uint64).reshape(a.shape[0] // t, t, a.shape[1] // (t * channels), words)
+        return (tiles * weights).sum(axis=(1, 3), dtype=np.uint64)
+
+    def dirty(self, rect, fingerprints, slot=None, settings=None):
+        """Rectangles (x0, y0, x1, y1) in capture pixels covering the tiles that changed, one per horizontal run; None if there's no
+        comparable previous capture (another rectangle, or blurred with other settings)."""
+        previous_rect, previous_settings, previous, _ = self.previous.get(slot, (None, None, None, None))
+        if previous is None or rect != previous_rect or settings != previous_settings or fingerprints.shape != previous.shape:
+            return None
+        t = self.tileSize
+        changed = fingerprints != previous
+        runs = []
+        for ty in np.flatnonzero(changed.any(axis=1)):
+            edges = np.flatnonzero(np.diff(np.concatenate(([False], changed[ty], [False])).astype(np.int8)))
+            runs.extend((start * t, ty * t, stop * t, (ty + 1) * t) for start, stop in zip(edges[::2], edges[1::2]))
+        self.counters['tiles'] += changed.size
+        self.counters['dirtyTiles'] += int(changed.sum())
+        return runs
+
+    @staticmethod
+    def merge(rects, margin):
+        """Merge rectangles whose margin-expanded areas overlap, since their re-blurs would read the same pixels."""
+        rects = list(rects)
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(rects)):
+                for j in range(i + 1, len(rects)):
+                    a, b = rects[i], rects[j]
+                    if a[0] - margin < b[2] + margin and b[0] - margin < a[2] + margin and a[1] - margin < b[3] + margin and b[1] - margin < a[3] + margin:
+                        rects[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                        del rects[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return rects
+
+    def remember(self, rect, fingerprints, blurred, slot=None, settings=None):
+        self.previous[slot] = (rect, settings, fingerprints, blurred)
+
+    def blurred(self, slot=None):
+        """The blurred image remembered for slot, or None."""
+        return self.previous.get(slot, (None, None, None, None))[3]
+
+    def stats(self):
+        return dict(self.counters)
+
+
+# QC FX Backdrop atlas; The blurred background upsampled once to display resolution, in tiles, so a move only copies a rectangle out
+class QCFx_BackdropAtlas:
+    def __init__(self, image, scale, origin, resample, tileSize=512, memoryBudget=128):
+        self.image = image
+        self.scale = scale
+        self.origin = origin
+        self.resample = resample
+        self.width = int(round(image.width * scale))
+        self.height = int(round(image.height * scale))
+        self.tileSize = tileSize
+        self.memoryBudget = memoryBudget * 1024 * 1024
+
+        self.lock = threading.Lock()
+        self.tiles = OrderedDict() # (tx, ty) -> QImage, least recently used first
+        self.bytes = 0
+
+    def build(self):
+        """Upsample every tile that fits in the memory budget; tiles beyond it are built on first use."""
+        columns = (self.width + self.tileSize - 1) // self.tileSize
+        rows = (self.height + self.tileSize - 1) // self.tileSize
+        tile_bytes = self.tileSize * self.tileSize * 4
+        for ty in range(rows):
+            for tx in range(columns):
+                if self.bytes + tile_bytes > self.memoryBudget:
+                    return
+                self._tile(tx, ty)
+
+    def _tile(self, tx, ty):
+        with self.lock:
+            tile = self.tiles.get((tx, ty))
+            if tile is not None:
+                self.tiles.move_to_end((tx, ty))
+                return tile
+
+        x0, y0 = tx * self.tileSize, ty * self.tileSize
+        width, height = min(self.tileSize, self.width - x0), min(self.tileSize, self.height - y0)
+        # Resampling a box of the whole image (rather than a crop of it) keeps the tile edges seamless
+        box = (x0 / self.scale, y0 / self.scale, (x0 + width) / self.scale, (y0 + height) / self.scale)
+        img = self.image.resize((width, height), self.resample, box=box)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        tile = ImageQt.ImageQt(img)
+
+        with self.lock:
+            self.tiles[(tx, ty)] = tile
+            self.bytes += width * height * 4
+            while self.bytes > self.memoryBudget and len(self.tiles) > 1:
+                (old_tx, old_ty), _ = self.tiles.popitem(last=False)
+                self.bytes -= min(self.tileSize, self.width - old_tx * self.tileSize) * min(self.tileSize, self.height - old_ty * self.tileSize) * 4
+        return tile
+
+    def frame(self, rect):
+        """Return a QImage of the screen rectangle (x, y, width, height), shifted inside the atlas if it sticks out."""
+        x, y, width, height = rect
+        width, height = min(width, self.width), min(height, self.height)
+        if width <= 0 or height <= 0:
+            return None
+        x = min(max(x - self.origin[0], 0), self.width - width)
+        y = min(max(y - self.origin[1], 0), self.height - height)
+
+        size = self.tileSize
+        tx0, ty0 = x // size, y // size
+        tx1, ty1 = (x + width - 1) // size, (y + height - 1) // size
+        if tx0 == tx1 and ty0 == ty1:
+            return self._tile(tx0, ty0).copy(x - tx0 * size, y - ty0 * size, width, height)
+
+        out = QImage(width, height, QImage.Format_RGB32)
+        painter = QPainter(out)
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                painter.drawImage(QPoint(tx * size - x, ty * size - y), self._tile(tx, ty))
+        painter.end()
+        return out
+
+
+# QC FX Frame pool; Recycled RGB32 buffers that QImages wrap directly, so a rendered frame is written once and handed to QPixmap without copies;
+# A QPixmap made from a frame reads the buffer, so the frame is only released once that pixmap is no longer shown
+class QCFx_Frame(QImage):
+    def __init__(self, pool, width, height):
+        self.pool = pool
+        self.buffer = np.empty((height, width, 4), dtype=np.uint8) # Rows of width*4 bytes; always 32-bit aligned as Qt requires
+        super().__init__(self.buffer.data, width, height, width * 4, pool.FORMAT)
+        # A PIL view sharing the same memory, so PIL can write the frame in place
+        self.view = Image.frombuffer('RGBX', (width, height), self.buffer, 'raw', 'RGBX', 0, 1)
+
+    def write(self, image):
+        """Copy an image made by QCFx_FramePool.frameSource (same size) into the buffer."""
+        # Image.paste would copy the read-only frombuffer view first; the core paste writes straight into self.buffer
+        self.view.im.paste(image.im, (0, 0, *image.size))
+        self.pool.count('bytesCopied', self.buffer.nbytes)
+
+    def release(self):
+        self.pool.release(self)
+
+
+class QCFx_FramePool:
+    # RGB32 is 0xffRRGGBB, i.e. B, G, R, X in memory on little-endian hosts; RGBX8888 is R, G, B, X everywhere
+    FORMAT = QImage.Format_RGB32 if sys.byteorder == 'little' else QImage.Format_RGBX8888
+
+    def __init__(self, capacity=3):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.free = []
+        self.counters = {'frames': 0, 'allocations': 0, 'bytesAllocated': 0, 'bytesCopied': 0}
+
+    @classmethod
+    def frameSource(cls, image):
+        """Convert a blurred background once per capture into the 4-byte channel order of FORMAT, so frames need no per-pixel conversion."""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        if cls.FORMAT == QImage.Format_RGB32:
+            r, g, b = image.split()
+            image = Image.merge('RGB', (b, g, r))
+        return image.convert('RGBX')
+
+    def acquire(self, width, height):
+        with self.lock:
+            self.counters['frames'] += 1
+            for i, frame in enumerate(self.free):
+                if frame.width() == width and frame.height() == height:
+                    return self.free.pop(i)
+            self.counters['allocations'] += 1
+            self.counters['bytesAllocated'] += width * height * 4
+        return QCFx_Frame(self, width, height)
+
+    def release(self, frame):
+        with self.lock:
+            if len(self.free) < self.capacity:
+                self.free.append(frame)
+
+    def count(self, key, value):
+        with self.lock:
+            self.counters[key] += value
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+# QC FX Render worker; One long-lived thread that renders the latest posted parent position and hands frames back to the GUI thread
+class QCFx_RenderWorker(QObject):
+    frameReady = Signal(object)
+
+    def __init__(self, render, present):
+        super().__init__()
+        self.render = render # Called on the worker thread with the posted rect; returns a QImage or None
+        self.present = present # Called on the GUI thread with each finished QImage
+
+        # Single-slot mailbox; a newer position replaces one that hasn't been picked up yet, so the last position always wins
+        self.condition = threading.Condition()
+        self.mailbox = None
+        self.stopped = False
+        self.counters = {'posted': 0, 'replaced': 0, 'rendered': 0}
+
+        self.frameReady.connect(self._deliver, Qt.QueuedConnection)
+
+        self.thread = threading.Thread(target=self._run, name='QCFx-render')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def post(self, rect):
+        with self.condition:
+            self.counters['posted'] += 1
+            if self.mailbox is not None:
+                self.counters['replaced'] += 1
+                QCFx_Profiler.shared().count('droppedFrames') # That position is never rendered
+            self.mailbox = rect
+            self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            return dict(self.counters)
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.mailbox is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                rect, self.mailbox = self.mailbox, None
+
+            try:
+                image = self.render(rect)
+            except Exception as e:
+                print(f"Error rendering background: {e}")
+                continue
+
+            if image is not None:
+                with self.condition:
+                    self.counters['rendered'] += 1
+                self.frameReady.emit(image)
+
+    @Slot(object)
+    def _deliver(self, image):
+        self.present(image)
+
+
+# QC FX Quality governor; While the parent is dragged, trades resample quality & frame resolution for frame time, and restores both when it stops
+class QCFx_QualityGovernor:
+    # (resample filter, None meaning the mode's own; fraction of the parent's size rendered), best first
+    LEVELS = ((None, 1.0), (Image.BILINEAR, 1.0), (Image.BILINEAR, 0.5), (Image.NEAREST, 0.5), (Image.NEAREST, 0.25))
+    FILTER_COST = (Image.NEAREST, Image.BOX, Image.BILINEAR, Image.HAMMING, Image.BICUBIC, Image.LANCZOS) # Cheapest first
+    RECOVER_FRAMES = 10 # Frames well under budget before stepping back up a level
+
+    def __init__(self, frameBudget=16, enabled=True):
+        self.frameBudget = frameBudget / 1000
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.moving = False
+        self.level = 0 # Kept between drags, so the next one starts where the last one settled
+        self.resample = None # The mode's own filter, as of the last quality() call
+        self.underBudget = 0
+        self.stages = {} # stage -> moving average of its duration in seconds
+        self.counters = {'frames': 0, 'overBudget': 0, 'degrades': 0, 'upgrades': 0, 'refinements': 0, 'previews': 0}
+
+    def setMoving(self, moving):
+        with self.lock:
+            self.moving = moving
+            if not moving:
+                self.counters['refinements'] += 1
+
+    def quality(self, resample=None):
+        """(resample filter, frame scale) for the next frame, given the mode's own filter; Full quality unless the parent is moving."""
+        with self.lock:
+            self.resample = resample
+            if not self.enabled or not self.moving:
+                return self._level(0)
+            return self._level(self.level)
+
+    def _level(self, level):
+        # A level never resamples with a filter more expensive than the mode's own; A NEAREST mode stays NEAREST
+        resample, scale = self.LEVELS[level]
+        if resample is None or self.resample is None:
+            return (resample if resample is not None else self.resample), scale
+        return min(resample, self.resample, key=self.FILTER_COST.index), scale
+
+    def degraded(self):
+        """True while a drag is running at reduced resolution; a capture made now may be a low-res preview too."""
+        with self.lock:
+            return self.enabled and self.moving and self.LEVELS[self.level][1] < 1.0
+
+    def measure(self, stage, seconds):
+        with self.lock:
+            previous = self.stages.get(stage)
+            self.stages[stage] = seconds if previous is None else previous * 0.7 + seconds * 0.3
+            if stage == 'preview':
+                self.counters['previews'] += 1
+
+    def frameTime(self):
+        with self.lock:
+            return self.stages.get('render', 0.0) + self.stages.get('present', 0.0)
+
+    def frameDone(self):
+        # Called after each presented frame; adjusts the level while moving
+        frame_time = self.frameTime()
+        with self.lock:
+            if not self.enabled or not self.moving:
+                return
+            self.counters['frames'] += 1
+            if frame_time > self.frameBudget:
+                self.counters['overBudget'] += 1
+                self.underBudget = 0
+                if self.level < len(self.LEVELS) - 1:
+                    current = self._level(self.level)
+                    self.level += 1
+                    while self.level < len(self.LEVELS) - 1 and self._level(self.level) == current: # Skip levels no cheaper for this mode
+                        self.level += 1
+                    self.counters['degrades'] += 1
+                    self.stages.pop('render', None) # Re-measure at the new level
+                    self.stages.pop('present', None)
+            elif frame_time < self.frameBudget / 2 and self.level > 0:
+                self.underBudget += 1
+                if self.underBudget >= self.RECOVER_FRAMES:
+                    current = self._level(self.level)
+                    self.level -= 1
+                    while self.level > 0 and self._level(self.level) == current:
+                        self.level -= 1
+                    self.underBudget = 0
+                    self.counters['upgrades'] += 1
+                    self.stages.pop('render', None)
+                    self.stages.pop('present', None)
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, 'level': self.level, 'moving': self.moving, 'frameBudget': self.frameBudget * 1000,
+                    'stages': {stage: seconds * 1000 for stage, seconds in self.stages.items()}}
+
+
+# QC FX Backdrop; A committed blurred background and everything needed to crop from it
+class QCFx_Backdrop:
+    def __init__(self, image, scale, origin, valid, frameSource, atlas=None):
+        self.image = image # Blurred PIL image
+        self.scale = scale # Screen pixels per image pixel
+        self.origin = origin # Screen position of the image's top-left pixel
+        self.valid = valid # Screen rectangle (x0, y0, x1, y1) with a correct blur
+        self.frameSource = frameSource # image in QCFx_FramePool's channel order
+        self.atlas = atlas # QCFx_BackdropAtlas (presentMode 'atlas')
+        self.preview = False # A low-res stand-in that a refresh replaces
+
+    @property
+    def rect(self):
+        """Screen rectangle (x, y, width, height) the image covers."""
+        return (*self.origin, round(self.image.width * self.scale), round(self.image.height * self.scale))
+
+
+# QC FX Compositor; One per process (and backend): owns the monitors, the refresh scheduler and the backdrops shared by every QCFx_Blur
+class QCFx_Compositor:
+    _instances = {}
+    _instancesLock = threading.Lock()
+
+    @classmethod
+    def acquire(cls, backend=None):
+        """Return the compositor for backend (None means the default desktop backend), creating it on first use."""
+        key = id(backend) if backend is not None else None
+        with cls._instancesLock:
+            compositor = cls._instances.get(key)
+            if compositor is None:
+                compositor = cls._instances[key] = cls(backend if backend is not None else QCFx_Win32Backend(), key)
+            return compositor
+
+    def __init__(self, backend, key=None):
+        self.backend = backend
+        self.key = key
+        self.lock = threading.RLock()
+        self.subscribers = []
+        self.backdrops = {} # (backdropKey, screen key) -> (generation, QCFx_Backdrop), the latest one built for each distinct set of blur settings & screen
+        self.generation = itertools.count(1) # Every backdrop build takes a ticket; subscribers drop results older than what they have
+        self.counters = {'builds': 0, 'shared': 0, 'mapped': 0}
+        self.shared_backdrops = {} # sharedKey -> QCFx_SharedBackdrop, backdrops exchanged with other processes
+        self.known_screens = None # backend.screens(), re-read at most once a second
+        self.paused = set() # Subscribers whose parent can't be seen; not refreshed, and no monitor runs for them
+        self.screens_checked = 0
+
+        self.stopped = threading.Event()
+        self.wallpaper_notified = threading.Event()
+        self.monitors = {} # name -> thread
+        self.current_hwnd = None # Window control
+        self.wallpaper_watcher = QCFx_WallpaperWatcher(backend)
+        self.window_index = QCFx_WindowIndex(backend)
+        self.scheduler = QCFx_RefreshScheduler(self.refresh)
+
+    def subscribe(self, blur):
+        """Add (or update) a QCFx_Blur; starts whichever monitors its settings ask for."""
+        with self.lock:
+            if blur not in self.subscribers:
+                self.subscribers.append(blur)
+            self.scheduler.setCoalesceWindow(min(b.refreshCoalesceWindow for b in self.subscribers))
+            self._startMonitors()
+
+    def unsubscribe(self, blur):
+        """Remove a QCFx_Blur; the last one out stops the monitors and the scheduler."""
+        with self.lock:
+            if blur in self.subscribers:
+                self.subscribers.remove(blur)
+            self.paused.discard(blur)
+            self._pruneBackdrops()
+            if self.subscribers:
+                return
+            self.stopped.set()
+            self.wallpaper_notified.set()
+            self.scheduler.stop()
+            for shared in self.shared_backdrops.values():
+                shared.close()
+            self.shared_backdrops.clear()
+
+        with self._instancesLock:
+            if self._instances.get(self.key) is self:
+                del self._instances[self.key]
+
+    def requestRefresh(self, source=None, targets=None):
+        self.scheduler.request(source, targets)
+
+    def pause(self, blur):
+        """Stop refreshing blur; monitors that only it needs exit at their next tick, and backdrops only it shares are handed over."""
+        with self.lock:
+            self.paused.add(blur)
+            # A paused producer would leave every other process on its last publish; Whoever needs the backdrop takes over
+            active = {key for b in self.subscribers if b not in self.paused for key in b.sharedKeys().values()}
+            for key in blur.sharedKeys().values():
+                shared = self.shared_backdrops.get(key)
+                if shared is not None and shared.producer and key not in active:
+                    shared.release()
+        self.wallpaper_notified.set() # The wallpaper monitor may be waiting on a notification for a minute; make it look now
+
+    def resume(self, blur):
+        """Undo pause(); blur gets one refresh for whatever it missed."""
+        with self.lock:
+            self.paused.discard(blur)
+            self._startMonitors()
+        self.requestRefresh('resume', [blur])
+
+    def backdrop(self, blur, preview=False):
+        """Return (generation, {screen key: backdrop}) for blur's settings & screens, reusing what another subscriber already has.
+
+        With preview, a missing backdrop is built at low resolution and a refresh refines it in the background.
+        """
+        key = blur.backdropKey()
+        screens = blur.captureScreens()
+        with self.lock:
+            entries = [self.backdrops.get((key, screen.key)) for screen in screens]
+            if all(entry is not None for entry in entries):
+                self.counters['shared'] += 1
+                return max(entry[0] for entry in entries), {screen.key: entry[1] for screen, entry in zip(screens, entries)}
+        if preview:
+            generation = next(self.generation)
+            backdrops = {screen.key: blur.buildBackdrop(screen, preview=True) for screen in screens}
+            if any(backdrop.preview for backdrop in backdrops.values()): # Not when the backdrop cache had them all
+                self.requestRefresh('refine', [blur])
+            return generation, backdrops
+        return self._build(blur, key, {})
+
+    def refresh(self, targets=None):
+        with self.lock:
+            subscribers = [b for b in self.subscribers if (targets is None or b in targets) and b not in self.paused]
+
+        # One screenshot per refresh and one blur per distinct set of settings & screen, however many subscribers there are
+        with QCFx_Profiler.shared().span('refresh'):
+            captures, built = {}, {}
+            for blur in subscribers:
+                if blur.commitBackdrop(*self._build(blur, blur.backdropKey(), captures, built)):
+                    blur.updateAsynchronous_(None)
+        self.wallpaper_watcher.discard()
+
+    def _build(self, blur, key, captures, built=None):
+        # built maps (backdropKey, screen key) to the backdrops already made in this refresh
+        generation = next(self.generation)
+        backdrops = {}
+        for screen in blur.captureScreens():
+            backdrop = built.get((key, screen.key)) if built is not None else None
+            if backdrop is not None:
+                with self.lock:
+                    self.counters['shared'] += 1
+            else:
+                backdrop = self._buildScreen(blur, screen, captures)
+                if built is not None:
+                    built[(key, screen.key)] = backdrop
+            backdrops[screen.key] = backdrop
+
+        with self.lock:
+            for screen_key, backdrop in backdrops.items():
+                current = self.backdrops.get((key, screen_key))
+                if current is None or current[0] < generation:
+                    self.backdrops[(key, screen_key)] = (generation, backdrop)
+            self._pruneBackdrops()
+        return generation, backdrops
+
+    def _buildScreen(self, blur, screen, captures):
+        shared = self._sharedBackdrop(blur, screen)
+        backdrop = None
+        if shared is not None and not shared.isProducer():
+            # Another process blurs; only copy its image (falls through to a local blur until it has published once)
+            # A copy, since the atlas crops tiles out of the image long after the producer has reused the slot
+            backdrop = shared.read(lambda image, rect, valid, radius: blur.makeBackdrop(image.convert('RGB'), rect, valid))
+            if backdrop is not None:
+                with self.lock:
+                    self.counters['mapped'] += 1
+        if backdrop is None:
+            backdrop = blur.buildBackdrop(screen, captures)
+            if shared is not None and shared.producer:
+                shared.publish(backdrop, blur.blurRadius)
+            with self.lock:
+                self.counters['builds'] += 1
+        return backdrop
+
+    def _sharedBackdrop(self, blur, screen):
+        key = blur.sharedKey(screen)
+        if key is None:
+            return None
+        with self.lock:
+            shared = self.shared_backdrops.get(key)
+            if shared is None:
+                shared = self.shared_backdrops[key] = QCFx_SharedBackdrop(os.path.join(blur.qcfx.DATA_PATH, 'shared'), key)
+            return shared
+
+    def _pruneBackdrops(self):
+        # Backdrops of screens no parent overlaps any more go too; moving back onto one rebuilds it
+        keys = {(b.backdropKey(), screen.key) for b in self.subscribers for screen in b.captureScreens()}
+        for key in list(self.backdrops):
+            if key not in keys:
+                del self.backdrops[key]
+        keys = {key for b in self.subscribers for key in b.sharedKeys().values()}
+        for key in list(self.shared_backdrops):
+            if key not in keys:
+                self.shared_backdrops.pop(key).close()
+
+    def screens(self):
+        """The backend's monitors, re-read at most once a second; a change of geometry or scale factor refreshes every subscriber."""
+        with self.lock:
+            if self.known_screens is not None and time.monotonic() - self.screens_checked < 1:
+                return self.known_screens
+            self.screens_checked = time.monotonic()
+            screens = self.backend.screens()
+            changed = self.known_screens is not None and [s.key for s in screens] != [s.key for s in self.known_screens]
+            self.known_screens = screens
+        if changed:
+            self.requestRefresh('screens')
+        return screens
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, 'subscribers': len(self.subscribers), 'backdrops': len(self.backdrops), 'monitors': sorted(self.monitors),
+                    'screens': [screen.key for screen in self.known_screens or ()], 'windows': self.window_index.stats(),
+                    'sharedBackdrops': {key: shared.stats() for key, shared in self.shared_backdrops.items()}}
+
+    # Monitors; one thread each for the whole process, running while at least one subscriber wants it
+    def _wanted(self, name):
+        # Paused subscribers want nothing, except that one only covered by other windows needs those watched to notice it's uncovered
+        subscribers = [b for b in self.subscribers if b not in self.paused or (name == 'otherWindows' and not b.lifecycle.hidden)]
+        if name == 'shared':
+            return [b for b in subscribers if b.sharedKeys()]
+        attribute = {'windowState': 'monitorWindowState', 'otherWindows': 'monitorOtherWindowsState', 'desktop': 'monitorDesktop'}[name]
+        return [b for b in subscribers if getattr(b, attribute)]
+
+    def _startMonitors(self):
+        loops = {'windowState': self.monitor_window_state, 'otherWindows': self.check_all_windows, 'desktop': self.wallpaperChangeCheck,
+                 'shared': self.watch_shared_backdrops}
+        for name, loop in loops.items():
+            if name not in self.monitors and self._wanted(name):
+                thread = threading.Thread(target=self._monitor, args=(name, loop), name=f'QCFx-{name}')
+                thread.daemon = True
+                self.monitors[name] = thread
+                thread.start()
+
+    def _monitor(self, name, loop):
+        try:
+            loop()
+        finally:
+            with self.lock:
+                if self.monitors.get(name) is threading.current_thread():
+                    del self.monitors[name]
+
+    def _keepMonitoring(self, name):
+        # Called once per tick; a monitor nobody wants any more exits, subscribe() starts it again if needed
+        with self.lock:
+            return not self.stopped.is_set() and bool(self._wanted(name))
+
+    def _requestFrom(self, name, source, regions=None):
+        # regions: screen rectangles that changed; only subscribers whose backdrop region they touch are refreshed
+        with self.lock:
+            targets = [b for b in self._wanted(name) if b not in self.paused and not b.lifecycle.covered] # covered: about to be paused
+        if regions is not None:
+            targets = [b for b in targets if any(QCFx_WindowIndex.touches(region, regions) for region in self._watchedRegions(b))]
+        if targets:
+            self.requestRefresh(source, targets)
+
+    def _watchedRegions(self, blur):
+        # Where this process produces a shared backdrop, it blurs the whole screen for readers whose parents may be anywhere on it;
+        # Their own refreshes only map what it published
+        with self.lock:
+            producing = {screen_key for screen_key, key in blur.sharedKeys().items() if key in self.shared_backdrops and self.shared_backdrops[key].producer}
+        return [blur.backdropRegion()] + [screen.rect for screen in blur.captureScreens() if screen.key in producing]
+
+    def _ownWindows(self):
+        with self.lock:
+            return {b.parent_hwnd for b in self.subscribers}
+
+    def wallpaperChangeCheck(self):
+        # Prefer an OS change notification; fall back to polling the (cheap) wallpaper signature every 2 seconds
+        notified = self.wallpaper_notified
+        try:
+            stop_watching = self.backend.watchWallpaper(notified.set)
+        except Exception as e:
+            print(f"Wallpaper change notifications unavailable: {e}")
+            stop_watching = None
+
+        # A change the first check finds happened while nothing watched (e.g. every subscriber was paused); resuming refreshes anyway
+        first = True
+        try:
+            while self._keepMonitoring('desktop'):
+                try:
+                    # A decoded wallpaper is ~40 MB at 4K; Only kept when a desktop-only subscriber's refresh will capture it:
+                    # the one a change requests, or at startup the refine of a preview (a backdrop cache hit has neither)
+                    with self.lock:
+                        keep = any(b._isDesktopOnly() and (not first or any(backdrop.preview for backdrop in b.backdrops.values()))
+                                   for b in self._wanted('desktop'))
+                    if self.wallpaper_watcher.check(keep) and not first:
+                        self._requestFrom('desktop', 'wallpaper')
+                    first = False
+
+                except PermissionError as e:
+                    print(f"Permission error accessing wallpaper: {e}")
+                    
+                    self.stopped.wait(2)
+                        
+                except Exception as e:
+                    print(f"Error in wallpaperChangeCheck: {e}")
+
+                if stop_watching is not None:
+                    notified.wait(60) # Only a safety net; notifications wake us up right away
+                    notified.clear()
+                else:
+                    self.stopped.wait(2)
+        finally:
+            if stop_watching is not None:
+                stop_watching()
+
+    def watch_shared_backdrops(self):
+        """Pick up backdrops other processes publish; a header read per shared backdrop every 250 ms."""
+        while not self.stopped.wait(0.25):
+            if not self._keepMonitoring('shared'):
+                return
+            with self.lock:
+                shared_backdrops = list(self.shared_backdrops.items())
+                subscribers = [b for b in self.subscribers if b not in self.paused]
+            for key, shared in shared_backdrops:
+                if shared.producer:
+                    continue
+                targets = [b for b in subscribers if key in b.sharedKeys().values()]
+                if not targets: # Only paused subscribers use it; don't claim back what pause() handed over
+                    continue
+                if shared.isProducer(): # The producer exited or paused; blur here from now on
+                    self.requestRefresh('shared', targets)
+                    continue
+                generation = shared.generation()
+                if generation and generation != shared.lastGeneration:
+                    self.requestRefresh('shared', targets)
+
+    def monitor_window_state(self):
+        self.current_hwnd = self.backend.foregroundWindow()
+        while not self.stopped.wait(1): # Check every second
+            if not self._keepMonitoring('windowState'):
+                return
+            new_hwnd = self.backend.foregroundWindow()
+            if new_hwnd != self.current_hwnd:
+                # Raising a window only changes what is under the old & new foreground windows
+                screen = QCFx_Screen.desktop(self.backend.screens())
+                regions = []
+                for hwnd in (self.current_hwnd, new_hwnd):
+                    try:
+                        regions.append(self.backend.windowRect(hwnd) or screen)
+                    except Exception:
+                        regions.append(screen)
+                self._requestFrom('windowState', 'windowState', regions)
+                self.current_hwnd = new_hwnd
+
+    def check_all_windows(self):
+        """Periodically diff the windows' rects, stacking, visibility & minimized state; refresh the subscribers whose backdrop a change touches."""
+        self.window_index.update()
+        while not self.stopped.wait(1): # Check every second
+            if not self._keepMonitoring('otherWindows'):
+                return
+            # The parents themselves move & restack all the time; moveStop and the window state monitor take care of those
+            regions = self.window_index.update(self._ownWindows())
+            # A parent buried under other windows is paused like a minimized one; Uncovering it resumes it with its own refresh
+            with self.lock:
+                watched = self._wanted('otherWindows')
+            for blur in watched:
+                blur.lifecycle.setCovered(self.window_index.covered(blur.parent_hwnd))
+            if regions:
+                self._requestFrom('otherWindows', 'otherWindows', regions)
+
+
+# QC FX Lifecycle; Pauses a QCFx_Blur while its parent can't be seen, and applies settings changes to just the subsystems they affect
+class QCFx_Lifecycle(QObject):
+    changed = Signal()
+
+    # Subsystem -> (QCFx_Blur method that (re)starts it, the settings it's built from)
+    SUBSYSTEMS = {
+        'fixedUpdate': ('_setupFixedUpdate', ('recursiveFixedUpdate', 'updateInterval')),
+        'movement': ('_setupMovement', ('windowMoveMonitoring',)),
+        'profiler': ('_setupProfiler', ('profiling', 'profileExport', 'profileFormat')),
+        'engine': ('_setupEngine', ('blurWorkers',)),
+        'cache': ('_setupCache', ('backdropCacheMemory', 'backdropCacheDisk')),
+        'incremental': ('_setupIncremental', ('incrementalBlur', 'incrementalTileSize')),
+        'governor': ('_setupGovernor', ('adaptiveQuality', 'frameBudget')),
+        'stylesheet': ('_setupStylesheet', ('blurLayerStylesheet',)),
+        'monitors': ('_setupMonitors', ('windowStateMonitoring', 'otherWindowsStateMonitoring', 'desktopMonitoring', 'refreshCoalesceWindow', 'sharedBackdrop')),
+    }
+
+    def __init__(self, blur):
+        super().__init__()
+        self.blur = blur
+        self.settings = None # Last settings applied
+        self.hidden = False # Parent hidden or minimized (Qt events)
+        self.covered = False # Parent hidden under other windows (the compositor's window index)
+        self.paused = False
+        self.pausedAt = None
+        self.closed = False
+        self.counters = {'pauses': 0, 'resumes': 0, 'pausedSeconds': 0.0, 'reloads': 0, 'restarts': {name: 0 for name in self.SUBSYSTEMS}, 'rebuilds': 0}
+
+        self.changed.connect(self._update, Qt.QueuedConnection)
+        blur.parent.installEventFilter(self)
+
+    def apply(self, settings):
+        """Take settings into use and return the keys that changed; the first call starts everything."""
+        blur = self.blur
+        first = self.settings is None
+        changed = set(settings) if first else {key for key in settings.keys() | self.settings.keys() if settings.get(key) != self.settings.get(key)}
+        if not changed:
+            return changed
+
+        key = None if first else blur.backdropKey()
+        blur.readSettings(settings)
+        for name, (setup, keys) in self.SUBSYSTEMS.items():
+            if changed.intersection(keys):
+                getattr(blur, setup)()
+                if not first:
+                    self.counters['restarts'][name] += 1
+        self.settings = settings
+
+        if first or blur.backdropKey() != key: # A different blur; settings that only change how it's presented or scheduled keep it
+            if not first:
+                self.counters['rebuilds'] += 1
+                if not changed.intersection(self.SUBSYSTEMS['incremental'][1]): # Its tiles & blurred images belong to the old blur
+                    blur._setupIncremental()
+            blur.commitBackdrop(*blur.compositor.backdrop(blur, preview=blur.progressiveStartup))
+            blur.updateAsynchronous_(None)
+        elif 'roiSlack' in changed and blur.captureRegion == 'parent':
+            blur.requestRefresh('reload')
+        if not first:
+            self.counters['reloads'] += 1
+        return changed
+
+    def eventFilter(self, obj, event):
+        # GUI thread; obj is the parent
+        if event.type() == QEvent.Move:
+            if self.blur.monitorWindowMovement:
+                self.blur.updateAsynchronous_(event)
+        elif event.type() in (QEvent.Show, QEvent.Hide, QEvent.WindowStateChange):
+            self.hidden = not obj.isVisible() or obj.window().isMinimized()
+            self._update()
+        return False
+
+    def setCovered(self, covered):
+        """Called by the compositor's other-windows monitor (any thread)."""
+        if covered != self.covered:
+            self.covered = covered
+            self.changed.emit()
+
+    @Slot()
+    def _update(self):
+        # GUI thread; timers can only be started & stopped here
+        paused = (self.hidden or self.covered) and not self.closed
+        if paused == self.paused:
+            return
+        self.paused = paused
+        blur = self.blur
+        if paused:
+            self.pausedAt = time.monotonic()
+            self.counters['pauses'] += 1
+            blur.RFUpdate.stop()
+            blur.movement_timer.stop()
+            blur.stopped_timer.stop()
+            if blur.parent_is_moving:
+                blur.parent_is_moving = False
+                blur.governor.setMoving(False)
+            blur.compositor.pause(blur)
+        else:
+            self.counters['resumes'] += 1
+            self.counters['pausedSeconds'] += time.monotonic() - self.pausedAt
+            blur.parent_rect = blur._parentRect()
+            blur._setupFixedUpdate()
+            blur._setupMovement()
+            blur.compositor.resume(blur) # One refresh, however much happened meanwhile
+
+    def close(self):
+        self.closed = True
+        try:
+            self.blur.parent.removeEventFilter(self)
+            self.blur.RFUpdate.stop()
+            self.blur.movement_timer.stop()
+            self.blur.stopped_timer.stop()
+        except RuntimeError: # The parent, and the timers with it, is being destroyed
+            pass
+
+    def stats(self):
+        counters = dict(self.counters, restarts=dict(self.counters['restarts']))
+        if self.paused:
+            counters['pausedSeconds'] += time.monotonic() - self.pausedAt
+        return {**counters, 'paused': self.paused, 'hidden': self.hidden, 'covered': self.covered, 'settings': self.blur.qcfx.store.stats()}
 
-        return self.loadSettings()
 
 class QCFx_Blur:
-    def __init__(self, parent, overlay=None, mode=None):
+    def __init__(self, parent, overlay=None, mode=None, backend=None):
         
         self.parent = parent
         self.qcfx = QCFx()
         self.mode = mode if mode!=None else self.qcfx.MODE_DESKTOPONLY_S
-        self.settings = self.qcfx.applySettings_fromMode(mode)
+        self.settings = self.qcfx.applySettings_fromMode(self.mode)
+        # Monitors, refreshes & backdrops are shared by every QCFx_Blur on the same backend
+        self.compositor = QCFx_Compositor.acquire(backend)
+        self.backend = self.compositor.backend
         
         
         if not self.settings['showWindowTitlebar']:
@@ -178,16 +2508,38 @@ class QCFx_Blur:
         self.initializeParent()
         
     def initializeParent(self):
+        self.frame_pool = QCFx_FramePool()
+        self.cache_lock = threading.Lock()
+        self.backdrops = {} # screen key -> committed QCFx_Backdrop, one per screen the parent overlaps
+        self.committed_generation = 0 # Generation of the committed backdrop; older results are dropped
+        self.image_qimage = None  # QImage for parent
+        self.presented_frame = None # QCFx_Frame the blur layer's pixmap still reads from; back to the pool once the next one is shown
+        self.parent_rect = self._parentRect() # Last parent geometry seen on the GUI thread, in physical pixels; the worker threads only read this copy
+        self.parent_hwnd = int(self.parent.window().winId()) # Changes to the parent's own window don't invalidate its backdrop; A child widget has none of its own
+        self.scheduler = self.compositor.scheduler
+        self.wallpaper_watcher = self.compositor.wallpaper_watcher
+        self.render_worker = QCFx_RenderWorker(self.generateParentBackground, self.updateParentBackground)
+        self.parent.destroyed.connect(self.close)
+
+        # Created once; the lifecycle starts & stops them as the settings and the parent's visibility change
+        self.RFUpdate = QTimer(self.parent)
+        self.RFUpdate.timeout.connect(self.FixedUpdate)
+        self.parent_is_moving = False
+        self.last_position = QPoint()
+        self.movement_timer = QTimer(self.parent)
+        self.movement_timer.timeout.connect(self.isParentStoppedMoving)
+        self.stopped_timer = QTimer(self.parent)
+        self.stopped_timer.setSingleShot(True)
+        self.stopped_timer.timeout.connect(self.OnParentStoppedMoving)
+
+        # Reads the settings, starts the timers & subsystems they ask for, subscribes to the compositor and commits the first backdrop
+        self.lifecycle = QCFx_Lifecycle(self)
+        self.lifecycle.apply(self.settings)
+
+    def readSettings(self, settings):
+        self.settings = settings
         self.recursiveFixedUpdateMode = self.settings['recursiveFixedUpdate']
-
-        if self.recursiveFixedUpdateMode:
-            self.updateInterval= self.settings['updateInterval'] if self.settings['updateInterval'] else 500
-            print('rCF')                
-            self.RFUpdate= QTimer(self.parent)
-            self.RFUpdate.timeout.connect(self.FixedUpdate)
-            self.RFUpdate.start(self.updateInterval)  
-
-
+        self.updateInterval = self.settings['updateInterval'] if self.settings['updateInterval'] else 500
         self.blurScalingFactor = self.settings['blurScalingFactor']
         self.monitorWindowState = self.settings['windowStateMonitoring']
         self.monitorWindowMovement = self.settings['windowMoveMonitoring']
@@ -195,161 +2547,318 @@ class QCFx_Blur:
         self.monitorOtherWindowsState = self.settings['otherWindowsStateMonitoring']
         self.blurRadius = self.settings['blurRadius']
         self.blurringFunction = self.settings['blurringFunction']
+        self.blurPipeline = self.settings['blurPipeline']
+        self.blurPrescale = self.settings['blurPrescale']
+        self.blurUpsample = self.settings['blurUpsample']
+        self.blurKernel = self.settings['blurKernel']
+        self.captureRegion = self.settings['captureRegion']
+        self.roiSlack = self.settings['roiSlack']
+        self.refreshCoalesceWindow = self.settings['refreshCoalesceWindow']
+        self.presentMode = self.settings['presentMode']
+        self.atlasTileSize = self.settings['atlasTileSize']
+        self.atlasMemoryBudget = self.settings['atlasMemoryBudget']
+        self.backdropCache = self.settings['backdropCache']
+        self.sharedBackdrop = self.settings['sharedBackdrop']
+        self.blurBands = self.settings['blurBands']
+        self.incrementalBlur = self.settings['incrementalBlur']
+        self.progressiveStartup = self.settings['progressiveStartup']
+        self.previewScale = self.settings['previewScale']
+
+    # Subsystems; each (re)starts from the current settings, so the lifecycle can restart just the ones whose settings changed
+    def _setupFixedUpdate(self):
+        if self.recursiveFixedUpdateMode and not self.lifecycle.paused:
+            self.RFUpdate.start(self.updateInterval)
+        else:
+            self.RFUpdate.stop()
 
-        self.cached_image = None  
-        self.image_qimage = None  # QImage for parent
-        self.processing_thread = None  # Background thread
-        self.current_hwnd = None # Window control
-
-        if self.monitorWindowState:
-            self.monitor_thread = threading.Thread(target=self.monitor_window_state)
-            self.monitor_thread.daemon = True
-            self.monitor_thread.start()
-        
-        if self.monitorWindowMovement:
-            self.parent_is_moving = False 
-            self.last_position = QPoint()  
-            self.parent.moveEvent = self.updateAsynchronous_
-        
-            self.movement_timer = QTimer(self.parent)
-            self.movement_timer.timeout.connect(self.isParentStoppedMoving)
+    def _setupMovement(self):
+        # Move events come through the lifecycle's event filter
+        if self.monitorWindowMovement and not self.lifecycle.paused:
             self.movement_timer.start(50)  # Check every 50 ms (adjust as needed)
+        else:
+            self.movement_timer.stop()
+            self.stopped_timer.stop()
 
-            self.stopped_timer = QTimer(self.parent)
-            self.stopped_timer.setSingleShot(True)
-            self.stopped_timer.timeout.connect(self.OnParentStoppedMoving)
+    def _setupMonitors(self):
+        # Window state, other windows & wallpaper monitoring run once per process in the compositor
+        self.compositor.subscribe(self)
 
+    def _setupProfiler(self):
+        self.profiler = QCFx_Profiler.shared()
+        if self.settings['profiling']:
+            self.profiler.enable(self.settings['profileExport'], self.settings['profileFormat'])
+        elif self.lifecycle.settings is not None and self.lifecycle.settings['profiling']: # Turned off by a reload
+            self.profiler.disable()
 
-        if self.monitorOtherWindowsState:    
-            
-            self.check_windows_thread = threading.Thread(target=self.check_all_windows)
-            self.check_windows_thread.daemon = True
-            self.check_windows_thread.start()
+    def _setupEngine(self):
+        self.blur_engine = QCFx_BlurEngine.shared(self.settings['blurWorkers']) if self.settings['blurWorkers'] else None
 
-        if self.monitorDesktop:
-            self.wallpaper_thread = threading.Thread(target=self.wallpaperChangeCheck)
-            self.wallpaper_thread.daemon = True
-            self.wallpaper_thread.start()
+    def _setupCache(self):
+        self.backdrop_cache = QCFx_BackdropCache.shared(os.path.join(self.qcfx.DATA_PATH, 'cache'), self.settings['backdropCacheMemory'], self.settings['backdropCacheDisk'])
 
+    def _setupIncremental(self):
+        self.dirty_tiles = QCFx_DirtyTiles(self.settings['incrementalTileSize'])
 
-        self.init_backgroundCapture()
+    def _setupGovernor(self):
+        self.governor = QCFx_QualityGovernor(self.settings['frameBudget'], self.settings['adaptiveQuality'])
 
+    def _setupStylesheet(self):
+        self.blurLayer.setStyleSheet(self.settings['blurLayerStylesheet'])
 
     def Reload(self):
-        self.settings = self.qcfx.loadSettings()
-        self.recursiveFixedUpdateMode = self.settings['recursiveFixedUpdate']
-        
-        if self.recursiveFixedUpdateMode:
-            self.updateInterval= self.settings['updateInterval'] if self.settings['updateInterval'] else 500
-            print('rCF')                
-            self.RFUpdate= QTimer(self.parent)
-            self.RFUpdate.timeout.connect(self.FixedUpdate)
-            self.RFUpdate.start(self.updateInterval)  
-
-
-        self.blurScalingFactor = self.settings['blurScalingFactor']
-        self.monitorWindowState = self.settings['windowStateMonitoring']
-        self.monitorWindowMovement = self.settings['windowMoveMonitoring']
-        self.monitorDesktop = self.settings['desktopMonitoring']
-        self.monitorOtherWindowsState = self.settings['otherWindowsStateMonitoring']
-        self.blurRadius = self.settings['blurRadius']
-        self.blurringFunction = self.settings['blurringFunction']
+        """Re-read the settings and apply what changed; returns the changed keys. Only the subsystems they affect restart."""
+        return self.lifecycle.apply(self.qcfx.applySettings_fromMode(self.mode))
 
-        self.cached_image = None  
-        self.image_qimage = None  # QImage for parent
-        self.processing_thread = None  # Background thread
-        self.current_hwnd = None # Window control
-
-        if self.monitorWindowState:
-            self.monitor_thread = threading.Thread(target=self.monitor_window_state)
-            self.monitor_thread.daemon = True
-            self.monitor_thread.start()
-        
-        if self.monitorWindowMovement:
-            self.parent_is_moving = False 
-            self.last_position = QPoint()  
-            self.parent.moveEvent = self.updateAsynchronous_
-        
-            self.movement_timer = QTimer(self.parent)
-            self.movement_timer.timeout.connect(self.isParentStoppedMoving)
-            self.movement_timer.start(50)  # Check every 50 ms (adjust as needed)
-
-            self.stopped_timer = QTimer(self.parent)
-            self.stopped_timer.setSingleShot(True)
-            self.stopped_timer.timeout.connect(self.OnParentStoppedMoving)
-
-        if self.monitorDesktop:
-            
-            self.wallpaper_path = None
-            self.desktopWallpaperChange = QTimer(self.parent)
-            self.desktopWallpaperChange.timeout.connect(self.wallpaperChangeCheck)
-            self.desktopWallpaperChange.start(2000)
-        print(self.monitorDesktop)
-        if self.monitorOtherWindowsState:    
-            
-            self.check_windows_thread = threading.Thread(target=self.check_all_windows)
-            self.check_windows_thread.daemon = True
-            self.check_windows_thread.start()
-
-        self.init_backgroundCapture()
-        
-        
+    def lifecycleStats(self):
+        """Paused state, pause/resume counts, seconds spent paused and restarts per subsystem."""
+        return self.lifecycle.stats()
 
     def updateAsynchronous_(self, event):
-        if self.processing_thread is None or not self.processing_thread.is_alive():
-            self.processing_thread = threading.Thread(target=self.generateParentBackground)
-            self.processing_thread.start()
+        # Called with the parent's move events (GUI thread), and with None by the scheduler after a refresh
+        if self.lifecycle.paused:
+            return
+        if event is not None:
+            self.parent_rect = self._parentRect()
+            if self._hasAtlas(): # Just a copy out of the atlas; cheaper inline than a thread hop
+                image = self.generateParentBackground(self.parent_rect)
+                if image is not None:
+                    self.updateParentBackground(image)
+                return
+        self.render_worker.post(self.parent_rect)
     
     def FixedUpdate(self):
-        self.init_backgroundCapture()
-        print('called fixed update')
-    
-        
-    def generateParentBackground(self):
-        if self.cached_image is None:
-            return
+        self.requestRefresh('fixedUpdate')
+
+    def requestRefresh(self, source=None):
+        """Invalidate the blurred background; The scheduler merges close requests into a single capture."""
+        self.compositor.requestRefresh(source, [self])
 
-        x = self.parent.pos().x()
-        y = self.parent.pos().y()
-        width = self.parent.width()
-        height = self.parent.height()
+    def refreshStats(self):
+        """Counters of requested, coalesced, executed and dropped refreshes, plus requests per source."""
+        return self.scheduler.stats()
+
+    def close(self):
+        """Stop rendering and leave the compositor; the shared monitors stop when the last QCFx_Blur closes."""
+        self.lifecycle.close()
+        self.render_worker.stop()
+        self.compositor.unsubscribe(self)
+    
         
-        scaled_x = int(x / self.blurScalingFactor)
-        scaled_y = int(y / self.blurScalingFactor)
-        scaled_width = int(width / self.blurScalingFactor)
-        scaled_height = int(height / self.blurScalingFactor)
+    def generateParentBackground(self, rect=None):
+        with self.profiler.span('render'):
+            if self._hasAtlas():
+                return self.atlasParentBackground(rect)
+
+            start = time.perf_counter()
+            resample, frame_scale = self.governor.quality(self._resampleFilter())
+            with self.profiler.span('crop'):
+                cropped_image = self.cropParentBackground(rect, frameSource=True, resample=resample, frameScale=frame_scale)
+            if cropped_image is None:
+                return None
+
+            # Written once into a recycled buffer that the QImage wraps; QPixmap work is left to updateParentBackground on the GUI thread
+            with self.profiler.span('qimage'):
+                frame = self.frame_pool.acquire(*cropped_image.size)
+                frame.write(cropped_image)
+            self.governor.measure('render', time.perf_counter() - start)
+            return frame
+
+    def _hasAtlas(self):
+        return self.presentMode == 'atlas' and bool(self.backdrops) and all(b.atlas is not None for b in self.backdrops.values())
+
+    def atlasParentBackground(self, rect=None):
+        rect = rect if rect is not None else self.parent_rect
+        with self.cache_lock:
+            backdrops = list(self.backdrops.values())
+            self._checkCoverage(rect)
+        parts = [b for b in backdrops if QCFx_WindowIndex.intersection(b.rect, rect) is not None]
+        with self.profiler.span('crop'):
+            if len(parts) <= 1:
+                return (parts or backdrops)[0].atlas.frame(rect)
+
+            # The parent straddles screens; each screen's atlas fills its own share of the frame
+            x, y, width, height = rect
+            out = QImage(width, height, QImage.Format_RGB32)
+            out.fill(Qt.black)
+            painter = QPainter(out)
+            for backdrop in parts:
+                part = QCFx_WindowIndex.intersection(backdrop.rect, rect)
+                painter.drawImage(QPoint(part[0] - x, part[1] - y), backdrop.atlas.frame(part))
+            painter.end()
+            return out
+
+    def cropParentBackground(self, rect=None, frameSource=False, resample=None, frameScale=1.0):
+        rect = rect if rect is not None else self.parent_rect
+        with self.cache_lock:
+            backdrops = list(self.backdrops.values())
+            self._checkCoverage(rect)
+        if not backdrops:
+            return None
+
+        x, y, width, height = rect
+        resample = resample if resample is not None else self._resampleFilter()
+        size = (max(int(width * frameScale), 1), max(int(height * frameScale), 1))
+        parts = [b for b in backdrops if QCFx_WindowIndex.intersection(b.rect, rect) is not None]
+        if len(parts) <= 1:
+            return self._cropBackdrop((parts or backdrops)[0], rect, size, resample, frameSource)
+
+        # The parent straddles screens; each screen's backdrop fills its own share of the frame (a gap between screens stays black)
+        frame = Image.new('RGBX' if frameSource else parts[0].image.mode, size)
+        sx, sy = size[0] / width, size[1] / height
+        for backdrop in parts:
+            px, py, pw, ph = QCFx_WindowIndex.intersection(backdrop.rect, rect)
+            x0, y0 = round((px - x) * sx), round((py - y) * sy)
+            x1, y1 = round((px + pw - x) * sx), round((py + ph - y) * sy)
+            if x1 > x0 and y1 > y0:
+                part = self._cropBackdrop(backdrop, (px, py, pw, ph), (x1 - x0, y1 - y0), resample, frameSource)
+                if part is not None:
+                    frame.paste(part, (x0, y0))
+        return frame
+
+    def _cropBackdrop(self, backdrop, rect, size, resample, frameSource=False):
+        # Crop the screen rectangle rect out of one backdrop, resized to size
+        x, y, width, height = rect
+        cached_image = backdrop.frameSource if frameSource else backdrop.image
+        scale, (origin_x, origin_y) = backdrop.scale, backdrop.origin
+
+        scaled_x = int((x - origin_x) / scale)
+        scaled_y = int((y - origin_y) / scale)
+        scaled_width = int(width / scale)
+        scaled_height = int(height / scale)
 
         scaled_x = max(scaled_x, 0)
         scaled_y = max(scaled_y, 0)
-        scaled_width = min(scaled_width, self.cached_image.width - scaled_x)
-        scaled_height = min(scaled_height, self.cached_image.height - scaled_y)
-
-        # Crop and blur the image from the smaller image
-        cropped_image = self.cached_image.crop((scaled_x, scaled_y, scaled_x + scaled_width, scaled_y + scaled_height))
-
-        # Resize the cropped image to match the window size
+        scaled_width = min(scaled_width, cached_image.width - scaled_x)
+        scaled_height = min(scaled_height, cached_image.height - scaled_y)
+        if scaled_width <= 0 or scaled_height <= 0:
+            return None
+
+        # Crop the smaller image and resize it to match the window size in one step (frameScale < 1 leaves the rest of the upscale to the GUI thread)
+        return cached_image.resize(size, resample, box=(scaled_x, scaled_y, scaled_x + scaled_width, scaled_y + scaled_height))
+
+    def _parentRect(self):
+        # Qt positions are device independent pixels, captures & window rects physical ones; Qt keeps each screen's top-left
+        # at its physical position and scales the rest of the screen by its device pixel ratio
+        pos = self.parent.pos()
+        x, y, width, height = pos.x(), pos.y(), self.parent.width(), self.parent.height()
+        handle = self.parent.window().windowHandle()
+        screen = handle.screen() if handle is not None else None
+        if screen is None or screen.devicePixelRatio() == 1:
+            return (x, y, width, height)
+        scale, origin = screen.devicePixelRatio(), screen.geometry().topLeft()
+        return (round(origin.x() + (x - origin.x()) * scale), round(origin.y() + (y - origin.y()) * scale), round(width * scale), round(height * scale))
+
+    def captureScreens(self):
+        """The screens the parent overlaps, whose backdrops are captured & blurred; the primary one if it's off-screen."""
+        screens = self.compositor.screens()
+        return [s for s in screens if QCFx_WindowIndex.intersection(s.rect, self.parent_rect) is not None] or screens[:1]
+
+    def _captureRect(self, screen):
+        # (x, y, width, height) to capture on screen; In ROI mode the parent plus the blur's halo (correct edges) and roiSlack (room to move)
+        if self.captureRegion != 'parent':
+            return screen.rect
+
+        screen_x0, screen_y0, screen_x1, screen_y1 = screen.bounds()
+        x, y, width, height = self.parent_rect
+        margin = self._halo() + self.roiSlack
+        # On the pipeline's pixel grid, counted from the screen's corner, so the blurred pixels line up with a full-screen capture's
+        align = self._pixelGrid()
+        x0, y0 = max(x - margin, screen_x0), max(y - margin, screen_y0)
+        x1, y1 = min(x + width + margin, screen_x1), min(y + height + margin, screen_y1)
+        if x1 <= x0 or y1 <= y0: # Parent is off this screen
+            return screen.rect
+        x0, y0 = screen_x0 + (x0 - screen_x0) // align * align, screen_y0 + (y0 - screen_y0) // align * align
+        x1, y1 = min(screen_x0 - (screen_x0 - x1) // align * align, screen_x1), min(screen_y0 - (screen_y0 - y1) // align * align, screen_y1)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _halo(self):
+        # Capture pixels a blurred pixel depends on in each direction: the kernel's support (blurRadius is a sigma, a Gaussian reaches
+        # ~3 of them) plus the resamplers' (Lanczos: 3 pixels each way, on the pipeline's pixel grid)
+        downscale_first = self.blurPipeline == 'downscaleFirst'
+        align = self._pixelGrid()
+        radius = self.blurRadius / align if downscale_first else self.blurRadius
+        support = QCFx_FastBlur.support(self.blurKernel, radius)
+        if support is None: # kawase; its reach depends on the image size, about a Gaussian's
+            support = QCFx_FastBlur.support('gaussian', radius)
+        return int(math.ceil(support * (align if downscale_first else 1))) + 8 * align
+
+    def _pixelGrid(self):
+        # Capture pixels per pixel of the image the pipeline resamples to (downscaleFirst: the one it blurs)
+        return self.blurScalingFactor * (max(self.blurPrescale, 1) if self.blurPipeline == 'downscaleFirst' else 1)
+
+    def backdropRegion(self):
+        """Screen rectangle whose content shows in the blurred background: the parent plus the blur's reach."""
+        x, y, width, height = self.parent_rect
+        halo = self._halo()
+        return (x - halo, y - halo, width + 2 * halo, height + 2 * halo)
+
+    def _validRect(self, rect, screen):
+        # Inner edges of a partial capture are blurred against missing pixels; Only edges on the screen border match a full-screen blur
+        screen_x0, screen_y0, screen_x1, screen_y1 = screen.bounds()
+        x, y, width, height = rect
+        halo = self._halo()
+        return (x + halo if x > screen_x0 else screen_x0,
+                y + halo if y > screen_y0 else screen_y0,
+                x + width - halo if x + width < screen_x1 else screen_x1,
+                y + height - halo if y + height < screen_y1 else screen_y1)
+
+    def _isCovered(self, rect):
+        # Every screen rect overlaps needs a committed backdrop whose correctly blurred part holds rect's share of that screen
+        if not self.backdrops:
+            return False
+        for screen in self.compositor.screens():
+            part = QCFx_WindowIndex.intersection(screen.rect, rect)
+            if part is None:
+                continue
+            backdrop = self.backdrops.get(screen.key)
+            if backdrop is None:
+                return False
+            x, y, width, height = part
+            valid_x0, valid_y0, valid_x1, valid_y1 = backdrop.valid
+            if not (valid_x0 <= x and valid_y0 <= y and x + width <= valid_x1 and y + height <= valid_y1):
+                return False
+        return True
+
+    def _checkCoverage(self, rect):
+        # The parent may have left the captured area (ROI) or moved onto another screen; Draw what we have and re-capture around its new position
+        if not self._isCovered(rect):
+            self.requestRefresh('roi' if self.captureRegion == 'parent' else 'screens')
+
+    def _resampleFilter(self):
         if self.blurringFunction == 2:
-            cropped_image = cropped_image.resize((width, height), Image.LANCZOS)
+            return Image.LANCZOS
         elif self.blurringFunction == 1:
-            cropped_image = cropped_image.resize((width, height), Image.BILINEAR)
-        else:
-            cropped_image = cropped_image.resize((width, height), Image.NEAREST)
-
-        # Convert PIL image to QImage
-
-        self.cropped_image_qimage = ImageQt.ImageQt(cropped_image)
-        # self.cropped_image_qimage = cropped_image
-
-        # Update the UI from the main thread
-        self.updateParentBackground()
-
-    @Slot()
-    def updateParentBackground(self):
-        # pixmap = self.__convertPiltoPixmap(self.cropped_image_qimage)
+            return Image.BILINEAR
+        return Image.NEAREST
+
+    def updateParentBackground(self, image):
+        # GUI thread only
+        start = time.perf_counter()
+        with self.profiler.span('present'):
+            self.cropped_image_qimage = image
         
-        pixmap = QPixmap.fromImage(self.cropped_image_qimage)
-        scaled_pixmap = pixmap.scaled(self.blurLayer.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-        self.blurLayer.setPixmap(scaled_pixmap)
+            with self.profiler.span('qimage'):
+                # On the raster backend the pixmap of an RGB32 QImage shares its memory, so a frame stays checked out while it's shown
+                pixmap = QPixmap.fromImage(self.cropped_image_qimage)
+                shown = image if isinstance(image, QCFx_Frame) else None
+                # Frames are rendered in physical pixels; on a HiDPI screen the pixmap says so instead of being scaled down
+                scale = self.blurLayer.devicePixelRatioF()
+                size = self.blurLayer.size() * scale
+                if pixmap.size() != size:
+                    # Reduced-resolution drag frames are upscaled the cheap way; the blur hides it and the refinement replaces them
+                    transformation = Qt.FastTransformation if self.governor.degraded() else Qt.SmoothTransformation
+                    pixmap = pixmap.scaled(size, Qt.KeepAspectRatioByExpanding, transformation)
+                    if shown is not None: # The scaled pixmap has its own pixels
+                        shown.release()
+                        shown = None
+                pixmap.setDevicePixelRatio(scale)
+            with self.profiler.span('setPixmap'):
+                self.blurLayer.setPixmap(pixmap)
+            previous, self.presented_frame = self.presented_frame, shown
+            if previous is not None: # Nothing shows it any more; the render thread may write it again
+                previous.release()
+        self.governor.measure('present', time.perf_counter() - start)
+        self.governor.frameDone()
 
     def _fade_step(self):
         opacity = 1.0 - (self.fade_step / self.fade_steps)
@@ -367,96 +2876,236 @@ class QCFx_Blur:
             self.opacity_effect.setOpacity(1.0)
 
             
-    # WORKES FOR WINDOWS ONLY
     def init_backgroundCapture(self):
-        screen_width, screen_height = pyautogui.size() 
-        if self.monitorDesktop and self.mode[0]==0:
-
-            SPI_GETDESKWALLPAPER = 0x0073
-            wallpaper_path_bin = ctypes.create_string_buffer(260)
-            ctypes.windll.user32.SystemParametersInfoA(SPI_GETDESKWALLPAPER, 260, wallpaper_path_bin, 0)
-            self.wallpaperPath =  wallpaper_path_bin.value.decode()
-
-            bgC = Image.open(self.wallpaperPath)
-
-            if self.blurringFunction == 2:
-                bgC = bgC.resize((screen_width, screen_height), Image.LANCZOS)
-            elif self.blurringFunction == 1:
-                bgC = bgC.resize((screen_width, screen_height), Image.BILINEAR)
+        backdrops = {screen.key: self.buildBackdrop(screen) for screen in self.captureScreens()}
+        return self.commitBackdrop(next(self.compositor.generation), backdrops)
+
+    def backdropKey(self):
+        """Subscribers with equal keys can share one backdrop."""
+        region = id(self) if self.captureRegion == 'parent' else 'screen'
+        return (self._isDesktopOnly(), region, self.blurRadius, self.blurScalingFactor, self.blurringFunction, self.blurPipeline,
+                self.blurPrescale, self.blurUpsample, self.blurKernel, self.backdropCache, self.sharedBackdrop, self.incrementalBlur, self.presentMode, self.atlasTileSize, self.atlasMemoryBudget)
+
+    def blurSettings(self):
+        """The settings a blurred capture depends on, besides its pixels."""
+        return {'blurRadius': self.blurRadius, 'blurScalingFactor': self.blurScalingFactor, 'blurringFunction': self.blurringFunction,
+                'blurPipeline': self.blurPipeline, 'blurPrescale': self.blurPrescale, 'blurUpsample': self.blurUpsample, 'blurKernel': self.blurKernel}
+
+    def sharedKey(self, screen):
+        """Name of the cross-process backdrop for this instance's settings on screen, or None if it isn't shared."""
+        if not self.sharedBackdrop or self.captureRegion == 'parent':
+            return None
+        return QCFx_SharedBackdrop.key(desktopOnly=self._isDesktopOnly(), screen=screen.key, **self.blurSettings())
+
+    def sharedKeys(self):
+        """sharedKey of every screen this instance captures, by screen key; empty if it doesn't share."""
+        if not self.sharedBackdrop or self.captureRegion == 'parent':
+            return {}
+        return {screen.key: self.sharedKey(screen) for screen in self.captureScreens()}
+
+    def buildBackdrop(self, screen, captures=None, preview=False):
+        """Capture & blur screen with this instance's settings; captures maps capture inputs to images already taken in this refresh."""
+        rect = self._captureRect(screen)
+        valid = self._validRect(rect, screen)
+        # A wallpaper (unlike a screenshot) is worth caching; its blur only depends on these inputs
+        cache_key, blurred = None, None
+        if self.backdropCache and self._isDesktopOnly():
+            cache_key = self.backdrop_cache.key(wallpaper=self.wallpaper_watcher.digest(), screen=screen.key, rect=rect, **self.blurSettings())
+            blurred = self.backdrop_cache.get(cache_key)
+
+        # A low-res stand-in at startup, or for an ROI re-capture while a drag is already running degraded; A cached blur beats both
+        if blurred is None and (preview or (self.captureRegion == 'parent' and self.governor.degraded())):
+            start = time.perf_counter()
+            with self.profiler.span('preview'):
+                backdrop = self.makeBackdrop(self._blurPreview(rect, screen), rect, valid, buildAtlas=False)
+            backdrop.preview = True
+            self.governor.measure('preview', time.perf_counter() - start)
+            return backdrop
+
+        if blurred is None:
+            capture = self.captureBackground(screen, rect, captures)
+            blurred = self._blurIncremental(capture, rect, screen.key) if self.incrementalBlur else self.blurBackground(capture)
+            if cache_key is not None:
+                self.backdrop_cache.put(cache_key, blurred)
+        return self.makeBackdrop(blurred, rect, valid)
+
+    def makeBackdrop(self, blurred, rect, valid, buildAtlas=True):
+        """Wrap a blurred capture of the screen rectangle rect, correctly blurred within valid, with what presenting it needs."""
+        scale = rect[2] / blurred.width
+
+        with self.profiler.span('conversion'):
+            frame_source = QCFx_FramePool.frameSource(blurred)
+        atlas = None
+        if buildAtlas and self.presentMode == 'atlas':
+            with self.profiler.span('atlas'):
+                atlas = QCFx_BackdropAtlas(blurred, scale, rect[:2], self._resampleFilter(), self.atlasTileSize, self.atlasMemoryBudget)
+                atlas.build()
+
+        return QCFx_Backdrop(blurred, scale, rect[:2], valid, frame_source, atlas)
+
+    def commitBackdrop(self, generation, backdrops):
+        with self.cache_lock:
+            if generation < self.committed_generation: # A capture that started later already finished
+                self.scheduler.drop()
+                return False
+            self.committed_generation = generation
+            self.backdrops = backdrops
+        return True
+
+    def _isDesktopOnly(self):
+        return self.monitorDesktop and self.mode[0]==0
+
+    def cacheStats(self):
+        """Hit/miss counters of the process-wide blurred backdrop cache."""
+        return self.backdrop_cache.stats()
+
+    def captureBackground(self, screen, rect=None, captures=None):
+        rect = rect if rect is not None else screen.rect
+        x, y, width, height = rect
+        screen_x, screen_y, screen_width, screen_height = screen.rect
+
+        capture_key = (self._isDesktopOnly(), screen.key, rect, self.blurringFunction)
+        if captures is not None and capture_key in captures:
+            return captures[capture_key]
+
+        with self.profiler.span('capture'):
+            if self._isDesktopOnly():
+                self.wallpaperPath = self.backend.wallpaperPath()
+                bgC = self.wallpaper_watcher.image()
+                # Every screen shows the wallpaper stretched over it; Resample only the part that lands inside rect
+                sx, sy = bgC.width / screen_width, bgC.height / screen_height
+                x, y = x - screen_x, y - screen_y
+                bgC = bgC.resize((width, height), self._resampleFilter(), box=(x * sx, y * sy, (x + width) * sx, (y + height) * sy))
             else:
-                bgC = bgC.resize((screen_width, screen_height), Image.NEAREST)
-
-        else:
-            screen_rect = (0, 0, *pyautogui.size())
-            bgC = pyautogui.screenshot(region=screen_rect)
+                bgC = self.backend.screenshot(rect)
         
+        if bgC.mode not in ("RGB", "L"):
+            with self.profiler.span('conversion'):
+                bgC = bgC.convert("RGB")
+        if captures is not None:
+            captures[capture_key] = bgC
+        return bgC
+
+    def blurBackground(self, bgC):
+        if self.blurPipeline == 'downscaleFirst':
+            return self._blurDownscaleFirst(bgC)
+
+        screen_width, screen_height = bgC.size
+        bgC = self._blur(bgC, self.blurRadius)
+        with self.profiler.span('resize'):
+            return bgC.resize((screen_width // self.blurScalingFactor, screen_height // self.blurScalingFactor), self._resampleFilter())
+
+    def _blurPreview(self, rect, screen):
+        # Capture straight at a fraction of the resolution and blur that; Skips the caches, the incremental state & the workers
+        x, y, width, height = rect
+        scale = self.blurScalingFactor * max(self.previewScale, 1)
+        size = (max(width // scale, 1), max(height // scale, 1))
+        if self._isDesktopOnly():
+            screen_x, screen_y, screen_width, screen_height = screen.rect
+            x, y = x - screen_x, y - screen_y
+            wallpaper = self.wallpaper_watcher.image()
+            sx, sy = wallpaper.width / screen_width, wallpaper.height / screen_height
+            bgC = wallpaper.resize(size, Image.BOX, box=(x * sx, y * sy, (x + width) * sx, (y + height) * sy))
+        else:
+            bgC = self.backend.screenshot(rect).resize(size, Image.BOX)
         if bgC.mode not in ("RGB", "L"):
             bgC = bgC.convert("RGB")
-
-        bgC = bgC.filter(ImageFilter.GaussianBlur(radius=self.blurRadius))
-
-        if self.blurringFunction == 2:
-            self.cached_image = bgC.resize((screen_width // self.blurScalingFactor, screen_height // self.blurScalingFactor), Image.LANCZOS)
-        elif self.blurringFunction == 1:
-            self.cached_image = bgC.resize((screen_width // self.blurScalingFactor, screen_height // self.blurScalingFactor), Image.BILINEAR)
+        return QCFx_FastBlur.blur(bgC, 'gaussian', self.blurRadius * size[0] / width)
+
+    def _blurIncremental(self, bgC, rect, slot=None):
+        # Compare tile fingerprints with the previous capture of the same rectangle (of the same screen); Re-blur what changed, reuse the rest
+        with self.profiler.span('fingerprint'):
+            fingerprints = self.dirty_tiles.fingerprint(bgC)
+        settings = self.blurSettings()
+        regions = self.dirty_tiles.dirty(rect, fingerprints, slot, settings)
+        if regions == []:
+            blurred = self.dirty_tiles.blurred(slot)
+            self.dirty_tiles.counters['unchanged'] += 1
         else:
-            self.cached_image = bgC.resize((screen_width // self.blurScalingFactor, screen_height // self.blurScalingFactor), Image.NEAREST)
-
-
-    def wallpaperChangeCheck(self):
-        old_hash = None
-        while True:
-            try:
-                SPI_GETDESKWALLPAPER = 0x0073
-                wallpaper_path_bin = ctypes.create_string_buffer(260)
-                ctypes.windll.user32.SystemParametersInfoA(SPI_GETDESKWALLPAPER, 260, wallpaper_path_bin, 0)
-                self.wallpaper_path = wallpaper_path_bin.value.decode()
-            
-                try:
-                    img = Image.open(self.wallpaper_path)
-                    img_hash = imagehash.average_hash(img)
-                    
-                    if old_hash is None:
-                        old_hash = img_hash
-
-                    elif old_hash != img_hash:
-                        old_hash = img_hash
-
-                        self.init_backgroundCapture()
-                        self.updateAsynchronous_(None)
-
-                except PermissionError as e:
-                    print(f"Permission error accessing wallpaper: {e}")
-                    
-                    time.sleep(2)
-                    
-            except Exception as e:
-                print(f"Error in wallpaperChangeCheck: {e}")
-
-            time.sleep(2)  # Check every 5 seconds for changes Check every 5 seconds for changes
-
+            blurred = self._reblurRegions(bgC, regions, self.dirty_tiles.blurred(slot)) if regions is not None else None
+            if blurred is None:
+                blurred = self.blurBackground(bgC)
+                self.dirty_tiles.counters['full'] += 1
+            else:
+                self.dirty_tiles.counters['incremental'] += 1
+        self.dirty_tiles.remember(rect, fingerprints, blurred, slot, settings)
+        return blurred
+
+    def _reblurRegions(self, bgC, regions, previous):
+        """Splice re-blurred regions into the previous blurred image; None when a full blur is needed (or cheaper)."""
+        width, height = bgC.size
+        downscale_first = self.blurPipeline == 'downscaleFirst'
+        align = self.blurScalingFactor * (max(self.blurPrescale, 1) if downscale_first else 1) # Pipeline's pixel grid, in capture pixels
+        out_scale = width // previous.width
+        support = QCFx_FastBlur.support(self.blurKernel, self.blurRadius / align if downscale_first else self.blurRadius)
+        # Crops only line up with the full image's resampling when they start & end on the grid
+        if support is None or width % align or height % align or out_scale < 1 or align % out_scale or previous.size != (width // out_scale, height // out_scale):
+            return None
+
+        # How far a changed pixel reaches in the blurred image: the blur's support plus the resamplers' (Lanczos: 3 pixels each way)
+        margin = support * (align if downscale_first else 1) + 8 * align
+        def expand(r, m):
+            return (max((r[0] - m) // align * align, 0), max((r[1] - m) // align * align, 0),
+                    min(-(-(r[2] + m) // align) * align, width), min(-(-(r[3] + m) // align) * align, height))
+
+        jobs = []
+        for region in QCFx_DirtyTiles.merge(regions, margin):
+            changed = expand(region, margin)
+            jobs.append((changed, expand(changed, margin))) # Blurring the changed area right needs its surroundings too
+        if sum((x1 - x0) * (y1 - y0) for _, (x0, y0, x1, y1) in jobs) > 0.75 * width * height:
+            return None
+
+        spliced = previous.copy()
+        for changed, source in jobs:
+            part = self.blurBackground(bgC.crop(source))
+            x0, y0 = (changed[0] - source[0]) // out_scale, (changed[1] - source[1]) // out_scale
+            x1, y1 = (changed[2] - source[0]) // out_scale, (changed[3] - source[1]) // out_scale
+            spliced.paste(part.crop((x0, y0, x1, y1)), (changed[0] // out_scale, changed[1] // out_scale))
+        return spliced
+
+    def profileStats(self):
+        """Per-stage latency histograms (ms), trigger & dropped-frame counters and thread utilization, plus this instance's refresh & frame counters."""
+        return {**self.profiler.stats(), 'refreshes': self.refreshStats(), 'frames': self.render_worker.stats()}
+
+    def qualityStats(self):
+        """Quality governor level, per-stage frame times (ms) and how often it degraded, recovered & refined."""
+        return self.governor.stats()
+
+    def incrementalStats(self):
+        """Full, incremental & unchanged refreshes, and how many of the compared tiles were dirty."""
+        return self.dirty_tiles.stats()
+
+    def _blur(self, bgC, radius):
+        with self.profiler.span('blur'):
+            if self.blur_engine is not None:
+                return self.blur_engine.blur(bgC, self.blurKernel, radius, self.blurBands)
+            return QCFx_FastBlur.blur(bgC, self.blurKernel, radius)
+
+    def _blurDownscaleFirst(self, bgC):
+        # A Gaussian of radius r removes all detail finer than ~r pixels, so shrinking before the blur (with the radius shrunk to match)
+        # gives the same result for a fraction of the cost; The blur itself hides the downscale, so a cheap box filter is enough.
+        screen_width, screen_height = bgC.size
+        target_size = (max(screen_width // self.blurScalingFactor, 1), max(screen_height // self.blurScalingFactor, 1))
+        work_scale = self.blurScalingFactor * max(self.blurPrescale, 1)
+        work_size = (max(int(screen_width / work_scale), 1), max(int(screen_height / work_scale), 1))
+
+        with self.profiler.span('resize'):
+            bgC = bgC.resize(work_size, Image.BOX)
+        bgC = self._blur(bgC, self.blurRadius / work_scale)
+
+        if self.blurUpsample and work_size != target_size:
+            with self.profiler.span('resize'):
+                bgC = bgC.resize(target_size, self._resampleFilter())
+        return bgC
 
-    def _get_desktop_wallpaper(self):
-        SPI_GETDESKWALLPAPER = 0x0073
-        buffer = ctypes.create_unicode_buffer(280)
-        ctypes.windll.user32.SystemParametersInfoW(SPI_GETDESKWALLPAPER, 280, buffer, 0)
-        return buffer.value
 
-    def monitor_window_state(self):
-        self.current_hwnd = win32gui.GetForegroundWindow()
-        while True:
-            time.sleep(1)  # Check every second
-            new_hwnd = win32gui.GetForegroundWindow()
-            if new_hwnd != self.current_hwnd:
-                self.init_backgroundCapture()
-                self.current_hwnd = new_hwnd
-    
-    
     def isParentStoppedMoving(self):
+        self.parent_rect = self._parentRect()
         current_position = self.parent.pos()
         if current_position != self.last_position:
             if not self.parent_is_moving:
                 self.parent_is_moving = True
+                self.governor.setMoving(True)
             self.last_position = current_position
             self.stopped_timer.start(200)  # Check if it stops moving after 200 ms
             
@@ -464,58 +3113,19 @@ class QCFx_Blur:
     def OnParentStoppedMoving(self):
         if self.parent_is_moving:
             self.parent_is_moving = False
-            self.init_backgroundCapture()
+            # Redraw the last position at full quality right away; the refresh that follows may take a while or be merged
+            self.governor.setMoving(False)
+            self.render_worker.post(self.parent_rect)
+            self.requestRefresh('moveStop')
             
                 
             
 
-    def check_all_windows(self):
-        """Periodically check the state of all windows and refresh the background if needed."""
-        previous_states = {}
-        while True:
-            time.sleep(1)  # Check every second
-            all_windows = self.get_all_windows()
-            current_states = {}
-
-            for hwnd in all_windows:
-                try:
-                    if win32gui.IsWindow(hwnd):
-                        current_states[hwnd] = win32gui.IsIconic(hwnd)
-                except Exception as e:
-                    print(f"Error checking window {hwnd}: {e}")
-
-            # Check for minimized windows
-            for hwnd, is_minimized in current_states.items():
-                was_minimized = previous_states.get(hwnd, False)
-                if is_minimized and not was_minimized:
-                    
-                    self.init_backgroundCapture()
-    
-                elif not is_minimized and was_minimized:
-    
-                    self.init_backgroundCapture()
-                
-            previous_states = current_states
-
-    def get_all_windows(self):
-        """Get a list of all window handles."""
-        windows = []
-        win32gui.EnumWindows(lambda hwnd, _: windows.append(hwnd), None)
-        return windows
-    
-
     def __convertPiltoPixmap(self, im):
-        if im.mode == "RGB":
-            r, g, b = im.split()
-            im = Image.merge("RGB", (b, g, r))
-        elif  im.mode == "RGBA":
-            r, g, b, a = im.split()
-            im = Image.merge("RGBA", (b, g, r, a))
-        elif im.mode == "L":
-            im = im.convert("RGBA")
-        # Bild in RGBA konvertieren, falls nicht bereits passiert
-        im2 = im.convert("RGBA")
-        data = im2.tobytes("raw", "RGBA")
-        qim = QImage(data, im.size[0], im.size[1], QImage.Format_ARGB32)
-        pixmap = QPixmap.fromImage(qim)
+        frame = self.frame_pool.acquire(*im.size)
+        frame.write(QCFx_FramePool.frameSource(im))
+        # The caller keeps the pixmap for as long as it likes; copy it out of the pooled buffer, which is reused right away
+        pixmap = QPixmap.fromImage(frame.copy())
+        self.frame_pool.count('bytesCopied', frame.buffer.nbytes)
+        frame.release()
         return pixmap
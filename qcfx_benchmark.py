@@ -0,0 +1,312 @@
+"""
+QC FX Benchmarks; Times the capture/blur refresh and the per-move present path on synthetic screens, headless.
+
+    python qcfx_benchmark.py --quick --out before.json
+    python qcfx_benchmark.py --quick --out after.json --compare before.json
+
+Every run sweeps screens x modes x blurRadius x blurScalingFactor (refreshes) and drag paths (frames), and reports
+throughput, p50/p99 latency & peak memory per case. Results are JSON with one entry per case id, so two runs can be
+compared; --compare exits with status 1 if any case got slower than --threshold allows.
+"""
+
+import os, sys, json, math, time, argparse, platform, tempfile, threading, tracemalloc, subprocess
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen') # Before Qt is imported
+
+import numpy as np
+import PIL
+
+from PySide2.QtWidgets import QApplication, QWidget
+
+import qcfx
+
+
+# Monitors (x, y, width, height) of each desktop, primary first
+SCREENS = {
+    '1080p': [(0, 0, 1920, 1080)],
+    '1440p': [(0, 0, 2560, 1440)],
+    '4k': [(0, 0, 3840, 2160)],
+    'wide': [(0, 0, 1920, 1080), (1920, 0, 1920, 1080), (3840, 0, 1920, 1080)], # Three 1080p monitors side by side
+}
+MODES = ('MODE_DESKTOPONLY_U', 'MODE_DESKTOPONLY_S', 'MODE_DESKTOPONLY_L', 'MODE_WINDOW_U', 'MODE_WINDOW_S', 'MODE_WINDOW_L')
+PATHS = ('line', 'circle', 'zigzag')
+
+# Settings every benchmark instance starts from; Nothing may change between two runs of the same case
+BENCHMARK_SETTINGS = {
+    'windowMoveMonitoring': False, # Drags are driven by the benchmark
+    'backdropCache': False, # Would turn every desktop refresh after the first into a cache hit
+    'progressiveStartup': False,
+    'adaptiveQuality': False,
+    'refreshCoalesceWindow': 0,
+}
+
+
+def syntheticScreen(size, seed=0):
+    """A deterministic desktop: gradient background with overlapping flat 'windows' and text-like stripes."""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    y, x = np.ogrid[0:height, 0:width]
+    screen = np.empty((height, width, 3), np.uint8)
+    screen[..., 0] = (x * 255 // max(width - 1, 1)).astype(np.uint8)
+    screen[..., 1] = (y * 255 // max(height - 1, 1)).astype(np.uint8)
+    screen[..., 2] = 128
+
+    for _ in range(max(width * height // 200000, 8)):
+        w, h = int(rng.integers(width // 10, width // 3)), int(rng.integers(height // 10, height // 2))
+        x0, y0 = int(rng.integers(0, width - w)), int(rng.integers(0, height - h))
+        screen[y0:y0 + h, x0:x0 + w] = rng.integers(0, 256, 3)
+        screen[y0:y0 + 24, x0:x0 + w] = rng.integers(0, 256, 3) # Title bar
+        for line in range(y0 + 40, y0 + h - 8, 18): # 'Text'
+            length = int(rng.integers(w // 4, w - 16))
+            screen[line:line + 8, x0 + 8:x0 + 8 + length] = rng.integers(0, 64, (8, length, 3))
+    return screen
+
+
+def dragPath(kind, screen, window, steps):
+    """Parent rectangles (x, y, width, height) along a drag across the screen."""
+    screen_width, screen_height = screen
+    width, height = window
+    span_x, span_y = max(screen_width - width, 0), max(screen_height - height, 0)
+    rects = []
+    for i in range(steps):
+        t = i / max(steps - 1, 1)
+        if kind == 'line':
+            x, y = t * span_x, span_y / 2
+        elif kind == 'circle':
+            x, y = span_x / 2 * (1 + math.cos(2 * math.pi * t)), span_y / 2 * (1 + math.sin(2 * math.pi * t))
+        elif kind == 'zigzag':
+            x, y = t * span_x, span_y * abs((t * 6) % 2 - 1)
+        else:
+            raise ValueError(f'Unknown drag path: {kind}')
+        rects.append((int(x), int(y), width, height))
+    return rects
+
+
+def currentRss():
+    """Resident memory of this process in bytes, or None where it can't be read."""
+    if sys.platform.startswith('linux'):
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD), ('PeakWorkingSetSize', ctypes.c_size_t),
+                        ('WorkingSetSize', ctypes.c_size_t), ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    return None
+
+
+class QCFx_MemoryProbe:
+    """Peak memory over a block: Python/NumPy allocations via tracemalloc, everything (PIL, Qt) via resident memory sampled every 2 ms."""
+
+    def __enter__(self):
+        self.baseline = currentRss()
+        self.peak = self.baseline
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+        tracemalloc.start()
+        return self
+
+    def _sample(self):
+        while not self.stopped.wait(0.002):
+            rss = currentRss()
+            if rss is not None and self.peak is not None:
+                self.peak = max(self.peak, rss)
+
+    def __exit__(self, *exc):
+        _, self.traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stopped.set()
+        self.thread.join()
+        return False
+
+    def stats(self):
+        rss = (self.peak - self.baseline) / 2 ** 20 if self.baseline is not None else None
+        return {'peakMemoryMB': rss, 'peakTracedMB': self.traced / 2 ** 20}
+
+
+def summarize(samples):
+    ms = np.array(samples) * 1000
+    return {'samples': len(samples), 'mean': float(ms.mean()), 'p50': float(np.percentile(ms, 50)), 'p99': float(np.percentile(ms, 99)),
+            'min': float(ms.min()), 'max': float(ms.max()), 'throughput': float(1000 / ms.mean()) if ms.mean() > 0 else float('inf')}
+
+
+class QCFx_Benchmark:
+    def __init__(self, dataPath, settings=None, repeats=5, dragSteps=120, window=(800, 600)):
+        self.dataPath = dataPath
+        self.settings = {**BENCHMARK_SETTINGS, **(settings or {})}
+        self.repeats = repeats
+        self.dragSteps = dragSteps
+        self.window = window
+        self.app = QApplication.instance() or QApplication([])
+        self.results = []
+
+    def _blur(self, backend, mode, **settings):
+        # Each instance reads its settings from the benchmark's own data directory, never the user's; A fresh instance per
+        # setting, so the lifecycle, the caches & the incremental state all match what these settings would give in an app
+        os.environ['QCFX_DATA'] = self.dataPath
+        settings = {**qcfx.QCFx().SETTINGS_DEFAULT, **self.settings, **settings}
+        with open(os.path.join(self.dataPath, 'settings.json'), 'w') as file:
+            json.dump({'Settings': settings}, file)
+        qcfx.QCFx().reloadSettings() # The rewrite may keep the file's size and mtime
+
+        parent = QWidget()
+        parent.resize(*self.window)
+        blur = qcfx.QCFx_Blur(parent, mode=getattr(qcfx.QCFx(), mode), backend=backend)
+        return parent, blur
+
+    def _record(self, case, samples, memory):
+        result = {**case, **summarize(samples), **memory.stats()}
+        self.results.append(result)
+        print(f"{result['id']:<52} p50 {result['p50']:9.2f} ms  p99 {result['p99']:9.2f} ms  {result['throughput']:8.1f}/s"
+              + (f"  +{result['peakMemoryMB']:.0f} MB" if result['peakMemoryMB'] is not None else ''), flush=True)
+
+    def run(self, screens, modes, radii, scales, paths):
+        for screen_name in screens:
+            monitors = SCREENS[screen_name]
+            desktop = qcfx.QCFx_Screen.desktop([qcfx.QCFx_Screen(*m) for m in monitors])
+            size = desktop[2:]
+            backend = qcfx.QCFx_SyntheticBackend(screens=[syntheticScreen(size)], wallpaper=syntheticScreen(monitors[0][2:], seed=1), monitors=monitors)
+            window = (min(self.window[0], size[0]), min(self.window[1], size[1]))
+
+            for mode in modes:
+                for scale in scales:
+                    for radius in radii:
+                        parent, blur = self._blur(backend, mode, blurRadius=radius, blurScalingFactor=scale)
+                        try:
+                            self.refreshCase(blur, screen_name, size, monitors, mode, radius, scale, window)
+                            # Present cost depends on the scale & the mode's resample filter, not on the radius
+                            if radius == radii[0]:
+                                for path in paths:
+                                    self.dragCase(blur, screen_name, size, desktop, mode, radius, scale, path, window)
+                        finally:
+                            blur.close()
+                            parent.deleteLater()
+                            self.app.processEvents()
+
+    def refreshCase(self, blur, screen_name, size, monitors, mode, radius, scale, window):
+        case = {'id': f'{screen_name}/{mode}/r{radius}/s{scale}/refresh', 'screen': screen_name, 'size': size, 'mode': mode,
+                'radius': radius, 'scale': scale, 'kind': 'refresh', 'monitors': len(monitors)}
+        if len(monitors) > 1: # Straddle the first two monitors, so the refresh captures, blurs & stitches both
+            x, y, _, height = monitors[1]
+            blur.parent_rect = (x - window[0] // 2, y + (height - window[1]) // 2, *window)
+        blur.init_backgroundCapture() # Warm up
+        samples = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            blur.init_backgroundCapture()
+            samples.append(time.perf_counter() - start)
+        with QCFx_MemoryProbe() as memory:
+            blur.init_backgroundCapture()
+        self._record(case, samples, memory)
+
+    def dragCase(self, blur, screen_name, size, desktop, mode, radius, scale, path, window):
+        case = {'id': f'{screen_name}/{mode}/r{radius}/s{scale}/drag-{path}', 'screen': screen_name, 'size': size, 'mode': mode,
+                'radius': radius, 'scale': scale, 'kind': 'drag', 'path': path}
+        # The drag crosses every monitor; Have all their backdrops up front, as the refreshes during a real drag would
+        blur.parent_rect = desktop
+        blur.init_backgroundCapture()
+        rects = dragPath(path, size, window, self.dragSteps)
+
+        def present(rect):
+            # What a move costs: the render thread's crop/resize into a frame, then the GUI thread's QPixmap & setPixmap
+            frame = blur.generateParentBackground(rect)
+            if frame is not None:
+                blur.updateParentBackground(frame)
+
+        present(rects[0])
+        samples = []
+        for rect in rects:
+            start = time.perf_counter()
+            present(rect)
+            samples.append(time.perf_counter() - start)
+        with QCFx_MemoryProbe() as memory:
+            for rect in rects[:10]:
+                present(rect)
+        self._record(case, samples, memory)
+
+    def metadata(self):
+        try:
+            commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+                'platform': platform.platform(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+                'pillow': PIL.__version__, 'numpy': np.__version__, 'settings': self.settings,
+                'repeats': self.repeats, 'dragSteps': self.dragSteps, 'window': self.window}
+
+
+def compare(results, baseline, threshold, minDelta):
+    """Print per-case changes against a baseline run; Returns the ids of the cases that got slower."""
+    previous = {case['id']: case for case in baseline['cases']}
+    regressions = []
+    for case in results['cases']:
+        old = previous.get(case['id'])
+        if old is None:
+            continue
+        for metric in ('p50', 'p99'):
+            ratio = case[metric] / old[metric] if old[metric] else float('inf')
+            slower = ratio > 1 + threshold and case[metric] - old[metric] > minDelta
+            faster = ratio < 1 / (1 + threshold) and old[metric] - case[metric] > minDelta
+            if slower or faster:
+                print(f"{'REGRESSION' if slower else 'improved':<10} {case['id']:<52} {metric} {old[metric]:9.2f} -> {case[metric]:9.2f} ms ({ratio:.2f}x)")
+            if slower and case['id'] not in regressions:
+                regressions.append(case['id'])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--screens', nargs='+', choices=SCREENS, default=list(SCREENS))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--radii', nargs='+', type=float, default=[10, 40, 80])
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--paths', nargs='+', choices=PATHS, default=list(PATHS))
+    parser.add_argument('--repeats', type=int, default=5, help='Timed refreshes per case')
+    parser.add_argument('--drag-steps', type=int, default=120, help='Moves per drag path')
+    parser.add_argument('--set', nargs='+', default=[], metavar='KEY=JSON', help='Extra QCFx settings, e.g. blurPipeline=\'"downscaleFirst"\'')
+    parser.add_argument('--quick', action='store_true', help='1080p & 4k, radius 40, scale 2, line drags only')
+    parser.add_argument('--out', default='qcfx-benchmark.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier result file; exit status 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.15, help='Relative slowdown that counts as a regression')
+    parser.add_argument('--min-delta', type=float, default=1.0, help='Ignore changes smaller than this many ms')
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.screens, args.radii, args.scales, args.paths = ['1080p', '4k'], [40], [2], ['line']
+    radii = [int(r) if float(r).is_integer() else r for r in args.radii]
+    settings = {}
+    for item in args.set:
+        key, _, value = item.partition('=')
+        settings[key] = json.loads(value)
+
+    with tempfile.TemporaryDirectory(prefix='qcfx-benchmark-') as data_path:
+        benchmark = QCFx_Benchmark(data_path, settings, args.repeats, args.drag_steps)
+        benchmark.run(args.screens, args.modes, radii, args.scales, args.paths)
+        results = {'meta': benchmark.metadata(), 'cases': benchmark.results}
+
+    with open(args.out, 'w') as file:
+        json.dump(results, file, indent=1)
+    print(f'Wrote {len(results["cases"])} cases to {args.out}')
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        print(f'{len(regressions)} regression(s) against {args.compare}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Pooled frames against offscreen Qt: a presented pixmap must not change when the render thread reuses a buffer.
+"""
+
+import os, sys, json, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ['QCFX_DATA'] = tempfile.mkdtemp(prefix='qcfx-test-')
+
+import numpy as np
+import pytest
+from PySide2.QtGui import QColor
+from PySide2.QtWidgets import QApplication, QWidget
+
+from qcfx import QCFx, QCFx_Blur, QCFx_SyntheticBackend
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def blur(app):
+    # Left half white, right half black; A small blur keeps the halves apart
+    qcfx = QCFx()
+    settings = dict(qcfx.SETTINGS_DEFAULT, blurRadius=2, blurScalingFactor=1, presentMode='crop', progressiveStartup=False,
+                    windowMoveMonitoring=False, windowStateMonitoring=False, otherWindowsStateMonitoring=False, desktopMonitoring=False)
+    with open(os.path.join(os.environ['QCFX_DATA'], 'settings.json'), 'w') as file:
+        json.dump({'Settings': settings}, file)
+    qcfx.reloadSettings()
+
+    screen = np.zeros((400, 800, 3), np.uint8)
+    screen[:, :400] = 255
+    parent = QWidget()
+    parent.resize(100, 100)
+    blur = QCFx_Blur(parent, mode=qcfx.MODE_WINDOW_S, backend=QCFx_SyntheticBackend(screens=[screen]))
+    yield blur
+    blur.close()
+    parent.deleteLater()
+
+
+def presented(blur):
+    return QColor(blur.blurLayer.pixmap().toImage().pixel(50, 50)).getRgb()[:3]
+
+
+def test_presented_pixmap_survives_the_next_render(blur):
+    blur.updateParentBackground(blur.generateParentBackground((100, 100, 100, 100)))
+    assert presented(blur) == (255, 255, 255)
+
+    # The render thread's next frames, not yet presented, may reuse any free buffer
+    for _ in range(4):
+        blur.generateParentBackground((600, 100, 100, 100))
+    assert presented(blur) == (255, 255, 255)
+
+
+def test_replaced_frames_go_back_to_the_pool(blur):
+    allocations = blur.frame_pool.stats()['allocations']
+    for x in (100, 600, 100, 600, 100, 600):
+        blur.updateParentBackground(blur.generateParentBackground((x, 100, 100, 100)))
+    assert presented(blur) == (0, 0, 0)
+    assert blur.frame_pool.stats()['allocations'] - allocations <= 2 # The one shown, and the one being rendered
@@ -0,0 +1,115 @@
+"""
+QCFx_SharedBackdrop's sequence lock, with a producer and a reader in one process; no display or QApplication needed.
+"""
+
+import os, sys, tempfile, threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PIL import Image
+
+from qcfx import QCFx_Backdrop, QCFx_SharedBackdrop
+
+
+def backdrop(color, size=(8, 4)):
+    return QCFx_Backdrop(Image.new('RGBX', size, color), 1.0, (0, 0), (0, 0, *size), None)
+
+
+@pytest.fixture
+def pair():
+    directory = tempfile.mkdtemp(prefix='qcfx-test-')
+    producer, reader = QCFx_SharedBackdrop(directory, 'test'), QCFx_SharedBackdrop(directory, 'test')
+    assert producer.isProducer() and not reader.isProducer()
+    yield producer, reader
+    reader.release()
+    producer.release()
+
+
+def pixels(image, rect, valid, radius):
+    return image.tobytes(), radius
+
+
+class HeldHeader:
+    # Stands in for QCFx_SharedBackdrop.HEADER; Holds a publish after its slot bytes are written, before the header flips
+    def __init__(self):
+        self.written, self.go = threading.Event(), threading.Event()
+
+    def __getattr__(self, name):
+        return getattr(QCFx_SharedBackdrop.HEADER, name)
+
+    def pack_into(self, *args):
+        self.written.set()
+        self.go.wait(5)
+        QCFx_SharedBackdrop.HEADER.pack_into(*args)
+
+
+def test_read_returns_the_published_pixels(pair):
+    producer, reader = pair
+    assert reader.read(pixels) is None
+    producer.publish(backdrop((255, 0, 0)), 1)
+    assert reader.read(pixels) == (backdrop((255, 0, 0)).image.tobytes(), 1)
+
+
+def test_one_publish_during_a_read_leaves_its_slot_alone(pair):
+    producer, reader = pair
+    producer.publish(backdrop((255, 0, 0)), 1)
+
+    def derive(*args):
+        result = pixels(*args)
+        producer.publish(backdrop((0, 255, 0)), 2)
+        return result
+
+    assert reader.read(derive) == (backdrop((255, 0, 0)).image.tobytes(), 1)
+    assert reader.stats()['retries'] == 0
+
+
+def test_resizing_publish_during_a_read_retries_it(pair):
+    producer, reader = pair
+    producer.publish(backdrop((255, 0, 0)), 1)
+    calls = []
+
+    def derive(*args):
+        calls.append(args)
+        if len(calls) == 1: # The idle slot at the new size overlaps the one being read
+            producer.publish(backdrop((0, 255, 0), size=(16, 8)), 2)
+        return pixels(*args)
+
+    assert reader.read(derive) == (backdrop((0, 255, 0), size=(16, 8)).image.tobytes(), 2)
+    assert len(calls) == 2
+
+
+def test_two_publishes_during_a_read_retry_it(pair):
+    producer, reader = pair
+    producer.publish(backdrop((255, 0, 0)), 1)
+    calls = []
+
+    def derive(*args):
+        calls.append(args)
+        if len(calls) == 1: # The second publish rewrites the slot being read
+            producer.publish(backdrop((0, 255, 0)), 2)
+            producer.publish(backdrop((0, 0, 255)), 3)
+        return pixels(*args)
+
+    assert reader.read(derive) == (backdrop((0, 0, 255)).image.tobytes(), 3)
+    assert len(calls) == 2
+
+
+def test_read_during_the_second_publishs_slot_write_is_not_accepted(pair):
+    producer, reader = pair
+    producer.publish(backdrop((255, 0, 0)), 1)
+    header = HeldHeader()
+
+    def derive(*args):
+        # The first publish fills the other slot; The second overwrites ours and is held before its header is written
+        producer.publish(backdrop((0, 255, 0)), 2)
+        producer.HEADER = header
+        threading.Thread(target=producer.publish, args=(backdrop((0, 0, 255)), 3), daemon=True).start()
+        assert header.written.wait(5)
+        return pixels(*args)
+
+    assert reader.read(derive) is None # Torn: blue pixels under red's header, never returned
+    header.go.set()
+    with producer.lock: # The held publish finishes
+        del producer.HEADER
+    assert reader.read(pixels) == (backdrop((0, 0, 255)).image.tobytes(), 3)
@@ -0,0 +1,54 @@
+"""
+QCFx_WallpaperWatcher against QCFx_SyntheticBackend; no display or QApplication needed.
+"""
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from qcfx import QCFx_SyntheticBackend, QCFx_WallpaperWatcher
+
+
+def watcher():
+    # Events are played with step(), never by the clock
+    first = np.zeros((90, 160, 3), np.uint8)
+    first[:, :80] = 255
+    backend = QCFx_SyntheticBackend(size=(160, 90), wallpaper=first, events=[(3600, 'wallpaper', 255 - first)])
+    wallpaper_watcher = QCFx_WallpaperWatcher(backend)
+    assert not wallpaper_watcher.check() # The first check has nothing to compare with
+    return backend, wallpaper_watcher
+
+
+def test_changed_wallpaper_is_kept_for_the_capture_only_if_asked():
+    backend, wallpaper_watcher = watcher()
+    backend.step()
+    assert wallpaper_watcher.check(keep=True)
+    assert wallpaper_watcher.decoded is not None
+    image = wallpaper_watcher.image()
+    assert image.getpixel((0, 0)) == (0, 0, 0)
+    assert wallpaper_watcher.decoded is None # Handed over, not pinned
+
+
+def test_changed_wallpaper_is_dropped_without_a_desktop_only_capture():
+    backend, wallpaper_watcher = watcher()
+    backend.step()
+    assert wallpaper_watcher.check()
+    assert wallpaper_watcher.decoded is None
+    assert wallpaper_watcher.image().getpixel((0, 0)) == (0, 0, 0)
+
+
+def test_discard_drops_an_image_no_capture_asked_for():
+    backend, wallpaper_watcher = watcher()
+    backend.step()
+    assert wallpaper_watcher.check(keep=True)
+    wallpaper_watcher.discard() # e.g. the refresh hit the backdrop cache
+    assert wallpaper_watcher.decoded is None
+
+
+def test_unchanged_wallpaper_isnt_decoded_again_or_kept():
+    _, wallpaper_watcher = watcher()
+    assert not wallpaper_watcher.check(keep=True)
+    assert wallpaper_watcher.decoded is None
+    assert wallpaper_watcher.stats()['decodes'] == 1
@@ -0,0 +1,166 @@
+"""
+QCFx_WindowIndex against QCFx_SyntheticBackend; no display or QApplication needed.
+
+Handles start at 101: under offscreen Qt, winId() numbers the parents' windows 1, 2, ...
+"""
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qcfx import QCFx_Blur, QCFx_SyntheticBackend, QCFx_WindowIndex
+
+
+def index(windows, events=()):
+    # Events are played with step(), never by the clock
+    backend = QCFx_SyntheticBackend(size=(1920, 1080), windows=windows, events=[(3600, action, arg) for action, arg in events])
+    window_index = QCFx_WindowIndex(backend)
+    assert window_index.update() == [] # The first snapshot has nothing to compare with
+    return backend, window_index
+
+
+def state(rect, z, visible=True, iconic=False, measured=True):
+    return (rect, z, visible, iconic, measured)
+
+
+# diff
+def test_unchanged_snapshot_marks_nothing():
+    windows = {101: state((0, 0, 100, 100), 0), 102: state((50, 50, 100, 100), 1)}
+    assert QCFx_WindowIndex.diff(windows, dict(windows)) == []
+
+
+def test_moved_window_marks_old_and_new_rect():
+    old = {101: state((0, 0, 100, 100), 0)}
+    new = {101: state((500, 500, 100, 100), 0)}
+    assert sorted(QCFx_WindowIndex.diff(old, new)) == [(0, 0, 100, 100), (500, 500, 100, 100)]
+
+
+def test_opened_and_closed_windows_mark_their_rect():
+    old = {101: state((0, 0, 100, 100), 0)}
+    new = {102: state((200, 200, 50, 50), 0)}
+    assert sorted(QCFx_WindowIndex.diff(old, new)) == [(0, 0, 100, 100), (200, 200, 50, 50)]
+
+
+def test_minimized_and_hidden_windows_mark_their_rect_once():
+    old = {101: state((0, 0, 100, 100), 0), 102: state((200, 0, 100, 100), 1)}
+    new = {101: state((0, 0, 100, 100), 0, iconic=True), 102: state((200, 0, 100, 100), 1, visible=False)}
+    assert sorted(QCFx_WindowIndex.diff(old, new)) == [(0, 0, 100, 100), (200, 0, 100, 100)]
+
+
+def test_window_hidden_throughout_marks_nothing():
+    old = {101: state((0, 0, 100, 100), 0, visible=False)}
+    new = {101: state((500, 500, 100, 100), 0, visible=False)}
+    assert QCFx_WindowIndex.diff(old, new) == []
+
+
+def test_z_shift_from_a_window_opening_above_marks_only_the_new_window():
+    old = {101: state((0, 0, 100, 100), 0), 102: state((50, 50, 100, 100), 1)}
+    new = {103: state((800, 800, 10, 10), 0), 101: state((0, 0, 100, 100), 1), 102: state((50, 50, 100, 100), 2)}
+    assert QCFx_WindowIndex.diff(old, new) == [(800, 800, 10, 10)]
+
+
+def test_swapped_stacking_order_marks_the_overlap():
+    old = {101: state((0, 0, 100, 100), 0), 102: state((50, 50, 100, 100), 1), 103: state((1000, 0, 10, 10), 2)}
+    new = {102: state((50, 50, 100, 100), 0), 101: state((0, 0, 100, 100), 1), 103: state((1000, 0, 10, 10), 2)}
+    assert QCFx_WindowIndex.diff(old, new) == [(50, 50, 50, 50)]
+
+
+def test_swapped_windows_that_dont_overlap_mark_nothing():
+    old = {101: state((0, 0, 100, 100), 0), 102: state((500, 500, 100, 100), 1)}
+    new = {102: state((500, 500, 100, 100), 0), 101: state((0, 0, 100, 100), 1)}
+    assert QCFx_WindowIndex.diff(old, new) == []
+
+
+def test_ignored_windows_mark_nothing():
+    old = {101: state((0, 0, 100, 100), 0)}
+    new = {101: state((500, 500, 100, 100), 0)}
+    assert QCFx_WindowIndex.diff(old, new, ignore={101}) == []
+
+
+def test_update_follows_scripted_events():
+    backend, window_index = index({101: {'rect': (0, 0, 100, 100)}, 102: {'rect': (50, 50, 100, 100)}},
+                                  [('move', (101, (300, 300, 100, 100))), ('minimize', 102), ('restore', 102), ('focus', 102)])
+    backend.step()
+    assert sorted(window_index.update()) == [(0, 0, 100, 100), (300, 300, 100, 100)]
+    backend.step()
+    assert window_index.update() == [(50, 50, 100, 100)]
+    backend.step()
+    assert window_index.update() == [(50, 50, 100, 100)]
+    backend.step() # Raising 102 over 101, which no longer overlaps it
+    assert window_index.update() == []
+    assert window_index.stats() == {'ticks': 5, 'changedTicks': 3, 'regions': 4, 'windows': 2}
+
+
+def test_unmeasured_window_stands_for_the_whole_desktop():
+    backend, window_index = index({101: {}}, [('hide', 101)])
+    backend.step()
+    assert window_index.update() == [(0, 0, 1920, 1080)]
+
+
+# touches
+class Blur:
+    # The settings QCFx_Blur.backdropRegion() reads, without a widget
+    parent_rect = (500, 500, 200, 100)
+    blurRadius, blurKernel, blurPipeline, blurScalingFactor, blurPrescale = 10, 'gaussian', 'blurFirst', 1, 1
+    backdropRegion, _halo, _pixelGrid = QCFx_Blur.backdropRegion, QCFx_Blur._halo, QCFx_Blur._pixelGrid
+
+
+def test_change_within_the_kernels_reach_touches_the_backdrop_region():
+    # A Gaussian reaches ~3 sigma; A change 2 sigma left of the parent still shows through the blur
+    region = Blur().backdropRegion()
+    assert QCFx_WindowIndex.touches(region, [(470, 500, 10, 100)])
+    assert QCFx_WindowIndex.touches(region, [(690, 580, 50, 50), (0, 0, 10, 10)])
+
+
+def test_change_beyond_the_kernels_reach_doesnt_touch_the_backdrop_region():
+    region = Blur().backdropRegion()
+    assert not QCFx_WindowIndex.touches(region, [(400, 500, 40, 100), (500, 700, 200, 10)])
+    assert not QCFx_WindowIndex.touches(region, [])
+
+
+# covered
+def test_window_under_a_larger_one_is_covered():
+    _, window_index = index({101: {'rect': (0, 0, 1920, 1080)}, 102: {'rect': (100, 100, 300, 200)}})
+    assert window_index.covered(102)
+    assert not window_index.covered(101)
+
+
+def test_window_covered_by_several_windows_together():
+    _, window_index = index({101: {'rect': (0, 0, 250, 1080)}, 102: {'rect': (250, 0, 250, 1080)}, 103: {'rect': (100, 100, 300, 200)}})
+    assert window_index.covered(103)
+
+
+def test_partly_covered_window_is_not_covered():
+    _, window_index = index({101: {'rect': (0, 0, 250, 1080)}, 102: {'rect': (100, 100, 300, 200)}})
+    assert not window_index.covered(102)
+
+
+def test_windows_below_dont_cover():
+    _, window_index = index({101: {'rect': (100, 100, 300, 200)}, 102: {'rect': (0, 0, 1920, 1080)}})
+    assert not window_index.covered(101)
+
+
+def test_minimized_hidden_and_unmeasured_windows_dont_cover():
+    backend, window_index = index({101: {'rect': (0, 0, 1920, 1080)}, 102: {'rect': (0, 0, 1920, 1080)}, 103: {},
+                                   104: {'rect': (100, 100, 300, 200)}}, [('minimize', 101), ('hide', 102)])
+    assert window_index.covered(104)
+    backend.step()
+    window_index.update()
+    assert window_index.covered(104)
+    backend.step()
+    window_index.update()
+    assert not window_index.covered(104)
+
+
+def test_covered_is_false_for_unknown_windows():
+    _, window_index = index({101: {'rect': (0, 0, 1920, 1080)}})
+    assert not window_index.covered(999)
+    assert not QCFx_WindowIndex(QCFx_SyntheticBackend()).covered(101) # Before the first update
+
+
+def test_subtract_returns_the_uncovered_pieces():
+    assert QCFx_WindowIndex.subtract((0, 0, 100, 100), (200, 200, 10, 10)) == [(0, 0, 100, 100)]
+    assert QCFx_WindowIndex.subtract((0, 0, 100, 100), (0, 0, 100, 100)) == []
+    pieces = QCFx_WindowIndex.subtract((0, 0, 100, 100), (25, 25, 50, 50))
+    assert sorted(pieces) == [(0, 0, 100, 25), (0, 25, 25, 50), (0, 75, 100, 25), (75, 25, 25, 50)]
+    assert sum(w * h for _, _, w, h in pieces) == 100 * 100 - 50 * 50